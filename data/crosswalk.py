@@ -0,0 +1,234 @@
+import os
+import sys
+import glob
+import json
+import argparse
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from wakeresults.cache import year_inputs, inputs_hash
+
+# Explicit precinct-to-precinct weights (splits, merges, renumbers)
+SPLITS_FILE = "precinct_splits.csv"
+
+# Re-aggregated outputs go to <CACHE_DIR>/<source>_on_<target>/
+CACHE_DIR = "crosswalk"
+
+# Bump when the outputs change for the same inputs
+CROSSWALK_VERSION = 2
+
+
+def load_weights(weights_file=SPLITS_FILE):
+    """
+    Load explicit crosswalk rows from a source_id,target_id,weight CSV.
+    Returns {source_id: [(target_id, weight), ...]}.
+    """
+    weights = defaultdict(list)
+    df = pd.read_csv(weights_file, dtype={"source_id": str, "target_id": str, "weight": float})
+    for source_id, target_id, weight in df.itertuples(index=False):
+        weights[source_id].append((target_id, weight))
+    return weights
+
+
+def year_precincts(year, json_dir="..", data_dir="."):
+    """Return the sorted union of precinct ids used by a year's outputs."""
+    ids = set()
+    for csv_file in year_csv_files(year, json_dir, data_dir):
+        ids.update(pd.read_csv(os.path.join(data_dir, csv_file), usecols=["id"], dtype=str)["id"])
+    return sorted(ids)
+
+
+def year_csv_files(year, json_dir="..", data_dir="."):
+    """List the contest CSVs from <year>.json plus the year's demoturnout CSV."""
+    return [os.path.basename(path) for path in year_inputs(year, json_dir, data_dir)[1:]]
+
+
+def resolve(source_id, target_index, weights, chain=()):
+    """
+    Resolve one source precinct to [(target_row, weight)].
+
+    Explicit weights win over identity; targets that are themselves not in the
+    target set are resolved again so chains of splits compose. A row mapping a
+    precinct onto itself keeps that share in place, and shares whose targets
+    do not exist in the target set stay with the source precinct when it
+    does (a split that happened after the target year). Raises ValueError
+    when the chain loops back to a precinct already on it.
+    """
+    if source_id in chain:
+        cycle = chain[chain.index(source_id):] + (source_id,)
+        raise ValueError(f"Cycle in crosswalk weights: {' -> '.join(cycle)}")
+    identity = [(target_index[source_id], 1.0)] if source_id in target_index else []
+    if source_id not in weights:
+        return identity
+
+    resolved, unresolved = [], 0.0
+    for target_id, weight in weights[source_id]:
+        targets = identity if target_id == source_id else resolve(target_id, target_index, weights, chain + (source_id,))
+        if not targets:
+            unresolved += weight
+        for row, w in targets:
+            resolved.append((row, weight * w))
+    if unresolved and identity:
+        resolved.append((identity[0][0], unresolved))
+    return resolved
+
+
+def build_crosswalk(source_ids, target_ids, weights):
+    """
+    Build a sparse (target x source) weight matrix.
+
+    Multiplying it by a (source precinct x column) count matrix re-aggregates
+    the counts onto the target precincts. Returns (matrix, unmatched source ids).
+    """
+    target_index = {pid: i for i, pid in enumerate(target_ids)}
+    rows, cols, data = [], [], []
+    unmatched = []
+
+    for col, source_id in enumerate(source_ids):
+        resolved = resolve(source_id, target_index, weights)
+        if not resolved:
+            unmatched.append(source_id)
+        for row, weight in resolved:
+            rows.append(row)
+            cols.append(col)
+            data.append(weight)
+
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(target_ids), len(source_ids)))
+    return matrix, unmatched
+
+
+def round_counts(values):
+    """
+    Round apportioned counts to integers, keeping each column's total: the
+    floors are raised by one in the rows with the largest remainders.
+    """
+    floors = np.floor(values + 1e-9)
+    remainders = values - floors
+    missing = np.rint(values.sum(axis=0) - floors.sum(axis=0)).astype(np.int64)
+    rank = np.argsort(np.argsort(-remainders, axis=0, kind="stable"), axis=0, kind="stable")
+    return (floors + (rank < missing)).astype(np.int64)
+
+
+def reaggregate(df, matrix, source_ids, target_ids):
+    """
+    Re-aggregate a results or demoturnout frame (id + count columns) onto the
+    target precincts with a single sparse matrix multiply. Split counts are
+    rounded to whole votes without changing any column total.
+    """
+    source_index = pd.Index(source_ids)
+    values = np.zeros((len(source_ids), df.shape[1] - 1))
+    values[source_index.get_indexer(df["id"])] = df.drop(columns="id").to_numpy(dtype=np.float64)
+
+    out = pd.DataFrame(round_counts(matrix @ values), columns=df.columns.drop("id"))
+    out.insert(0, "id", target_ids)
+
+    # Keep the test.py convention of omitting precincts with no votes
+    return out.loc[out.drop(columns="id").sum(axis=1) != 0]
+
+
+def crosswalk_year(source_year, target_year, json_dir="..", data_dir=".", weights_file=SPLITS_FILE,
+                   cache_dir=CACHE_DIR, force=False):
+    """
+    Re-aggregate every output of source_year onto target_year's precincts.
+
+    Results are cached in <cache_dir>/<source>_on_<target>/ together with the
+    crosswalk matrix; the cache is reused until the content hash of the inputs changes.
+    """
+    out_dir = os.path.join(cache_dir, f"{source_year}_on_{target_year}")
+    manifest_file = os.path.join(out_dir, "manifest.json")
+
+    # 1. Check the cache for this (source year, target year) pair
+    csv_files = year_csv_files(source_year, json_dir, data_dir)
+    inputs = year_inputs(source_year, json_dir, data_dir) + year_inputs(target_year, json_dir, data_dir) + [weights_file]
+    signature = inputs_hash(sorted(set(inputs)), CROSSWALK_VERSION)
+
+    if not force and os.path.exists(manifest_file):
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("inputs") == signature:
+            return out_dir, manifest
+
+    # 2. Build the crosswalk matrix
+    source_ids = year_precincts(source_year, json_dir, data_dir)
+    target_ids = year_precincts(target_year, json_dir, data_dir)
+    matrix, unmatched = build_crosswalk(source_ids, target_ids, load_weights(weights_file))
+
+    os.makedirs(out_dir, exist_ok=True)
+    sparse.save_npz(os.path.join(out_dir, "crosswalk.npz"), matrix)
+    np.savez(os.path.join(out_dir, "crosswalk_ids.npz"), source_ids=np.array(source_ids), target_ids=np.array(target_ids))
+
+    # 3. Re-aggregate every contest CSV and the demoturnout CSV. Counts of unmatched precincts
+    # have nowhere to go; any other difference in the totals means the weights lost votes
+    lost, unmatched_counts = {}, {}
+    for csv_file in csv_files:
+        df = pd.read_csv(os.path.join(data_dir, csv_file), dtype={"id": str})
+        out = reaggregate(df, matrix, source_ids, target_ids)
+        out.to_csv(os.path.join(out_dir, csv_file), index=False)
+        counts = df.drop(columns="id").to_numpy()
+        dropped = int(counts[df["id"].isin(unmatched).to_numpy()].sum())
+        missing = int(counts.sum() - out.drop(columns="id").to_numpy().sum()) - dropped
+        if dropped:
+            unmatched_counts[csv_file] = dropped
+        if missing:
+            lost[csv_file] = missing
+
+    manifest = {
+        "source_year": source_year,
+        "target_year": target_year,
+        "files": csv_files,
+        "unmatched": unmatched,
+        "unmatched_counts": unmatched_counts,
+        "lost": lost,
+        "inputs": signature,
+    }
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return out_dir, manifest
+
+
+def available_years(json_dir=".."):
+    return sorted(int(os.path.basename(p)[:4]) for p in glob.glob(os.path.join(json_dir, "[0-9][0-9][0-9][0-9].json")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-aggregate a year's results and turnout onto another year's precincts.")
+    parser.add_argument("source_years", nargs="*", type=int, help="Years whose outputs should be re-aggregated")
+    parser.add_argument("--target", type=int, default=2024, help="Target precinct year (default: 2024)")
+    parser.add_argument("--json-dir", default="..", help="Directory containing <year>.json (default: ..)")
+    parser.add_argument("--data-dir", default=".", help="Directory containing the CSV outputs (default: .)")
+    parser.add_argument("--weights", default=SPLITS_FILE, help=f"Crosswalk weights CSV (default: {SPLITS_FILE})")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help=f"Output/cache directory (default: {CACHE_DIR})")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the cache is current")
+    parser.add_argument("--check", action="store_true",
+                        help="Crosswalk every year onto the next one instead and fail unless the weights conserve every total")
+    args = parser.parse_args()
+
+    if args.check:
+        years = available_years(args.json_dir)
+        pairs = list(zip(years, years[1:]))
+    else:
+        pairs = [(year, args.target) for year in args.source_years]
+
+    conserved = True
+    for source_year, target_year in pairs:
+        out_dir, manifest = crosswalk_year(source_year, target_year, args.json_dir, args.data_dir, args.weights,
+                                           args.cache_dir, args.force)
+        print(f"{source_year} on {target_year}: {len(manifest['files'])} files in {out_dir}")
+        if manifest["unmatched"]:
+            print(f"  Unmatched precincts: {', '.join(manifest['unmatched'])}")
+        for csv_file, dropped in manifest["unmatched_counts"].items():
+            print(f"  {csv_file}: {dropped} counts in unmatched precincts")
+        for csv_file, missing in manifest["lost"].items():
+            print(f"  {csv_file}: {missing} counts lost by the crosswalk weights")
+        conserved = conserved and not manifest["lost"]
+    if args.check and not conserved:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
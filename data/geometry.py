@@ -0,0 +1,233 @@
+import os
+import json
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+# Zoom levels to precompute simplified shapes for; the tolerance at each level
+# is half a screen pixel in degrees (256px tiles)
+ZOOM_LEVELS = (10, 12, 14)
+DEFAULT_ZOOM = 12
+
+
+def zoom_tolerance(zoom):
+    """Half a pixel at the given web-mercator zoom, in degrees."""
+    return 360.0 / (256 * 2 ** zoom) / 2
+
+
+def feature_polygons(geometry):
+    """Return a geometry's polygons as lists of rings (Polygon -> [rings])."""
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def ring_area_centroid(ring):
+    """
+    Signed shoelace area and centroid of a ring, computed the same way as
+    calculateArea/calculateCentroid in maputils.js (planar lng/lat).
+    """
+    xy = np.asarray(ring, dtype=np.float64)[:, :2]
+    x, y = xy[:, 0], xy[:, 1]
+    xj, yj = np.roll(x, 1), np.roll(y, 1)
+    cross = x * yj - xj * y
+    area = cross.sum() / 2
+    if area == 0:
+        return 0.0, (float(y.mean()), float(x.mean()))
+    lng = ((x + xj) * cross).sum() / (6 * area)
+    lat = ((y + yj) * cross).sum() / (6 * area)
+    return abs(float(area)), (float(lat), float(lng))
+
+
+def label_point(geometry):
+    """
+    Label point and total area of a feature: the centroid of the outer ring of
+    its largest polygon, as getFeatureCenter does on the client.
+    """
+    if geometry["type"] == "Point":
+        lng, lat = geometry["coordinates"][:2]
+        return [lat, lng], 0.0
+
+    measured = [ring_area_centroid(polygon[0]) for polygon in feature_polygons(geometry)]
+    if not measured:
+        return None, 0.0
+    area, centroid = max(measured, key=lambda m: m[0])
+    return [round(centroid[0], 6), round(centroid[1], 6)], sum(m[0] for m in measured)
+
+
+def douglas_peucker(points, tolerance):
+    """Return a boolean keep-mask for an open polyline (endpoints always kept)."""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        segment = points[start + 1:end]
+        ab = b - a
+        length = np.hypot(ab[0], ab[1])
+        if length == 0:
+            dist = np.hypot(segment[:, 0] - a[0], segment[:, 1] - a[1])
+        else:
+            dist = np.abs(ab[0] * (segment[:, 1] - a[1]) - ab[1] * (segment[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def edge_key(a, b):
+    """Direction-independent key of the segment between two vertices."""
+    return (a, b) if a <= b else (b, a)
+
+
+class Topology:
+    """
+    Shared-boundary index over every ring of a FeatureCollection.
+
+    Rings are cut into arcs at junctions (vertices where the set of rings
+    sharing the boundary changes from one segment to the next, or that more
+    than two rings touch), and each distinct arc is simplified once, so borders
+    shared by neighbouring precincts stay identical and no gaps or overlaps
+    appear between simplified shapes.
+    """
+
+    def __init__(self, features):
+        self.rings = []  # (feature index, polygon index, ring index, coords)
+        for fi, feature in enumerate(features):
+            for pi, polygon in enumerate(feature_polygons(feature.get("geometry") or {"type": None})):
+                for ri, ring in enumerate(polygon):
+                    coords = [tuple(c[:2]) for c in ring]
+                    if len(coords) > 1 and coords[0] == coords[-1]:
+                        coords = coords[:-1]  # Work on open rings
+                    self.rings.append((fi, pi, ri, coords))
+
+        # Which rings use each vertex and each (undirected) segment
+        self.users = defaultdict(set)
+        self.edge_users = defaultdict(set)
+        for i, (_, _, _, coords) in enumerate(self.rings):
+            for k, c in enumerate(coords):
+                self.users[c].add(i)
+                self.edge_users[edge_key(c, coords[(k + 1) % len(coords)])].add(i)
+
+        self.cache = {}
+
+    def junctions(self, coords):
+        """Indexes of vertices where the ring's neighbours change."""
+        n = len(coords)
+        found = []
+        for k in range(n):
+            before = self.edge_users[edge_key(coords[k - 1], coords[k])]
+            after = self.edge_users[edge_key(coords[k], coords[(k + 1) % n])]
+            if len(self.users[coords[k]]) > 2 or before != after:
+                found.append(k)
+        return found
+
+    def simplify_arc(self, arc, tolerance):
+        """Simplify one arc; the reverse arc gets the mirrored result."""
+        key = (tuple(arc), tolerance)
+        if key not in self.cache:
+            reverse = (tuple(reversed(arc)), tolerance)
+            if reverse in self.cache:
+                return list(reversed(self.cache[reverse]))
+            points = np.asarray(arc, dtype=np.float64)
+            self.cache[key] = [arc[i] for i in np.flatnonzero(douglas_peucker(points, tolerance))]
+        return self.cache[key]
+
+    def simplify_ring(self, coords, tolerance):
+        """Simplify an open ring arc by arc and return it closed."""
+        cuts = self.junctions(coords)
+        if not cuts:
+            # Ring with one neighbour throughout (or none): anchor on its smallest
+            # vertex so both sides of a shared ring cut it in the same place
+            cuts = [coords.index(min(coords))]
+        n = len(coords)
+        out = []
+        for a, b in zip(cuts, cuts[1:] + [cuts[0] + n]):
+            arc = [coords[k % n] for k in range(a, b + 1)]
+            out.extend(self.simplify_arc(arc, tolerance)[:-1])
+        if len(out) < 3:
+            out = list(coords)  # Never collapse a ring
+        return [list(c) for c in out + [out[0]]]
+
+    def simplified_geometries(self, features, tolerance):
+        """Return every feature's geometry simplified at tolerance."""
+        geometries = [json.loads(json.dumps(f.get("geometry"))) for f in features]
+        for fi, pi, ri, coords in self.rings:
+            ring = self.simplify_ring(coords, tolerance)
+            geometry = geometries[fi]
+            if geometry["type"] == "Polygon":
+                geometry["coordinates"][ri] = ring
+            else:
+                geometry["coordinates"][pi][ri] = ring
+        return geometries
+
+
+def build_derived(geojson, zoom_levels=ZOOM_LEVELS, default_zoom=DEFAULT_ZOOM):
+    """
+    Build the derived precinct geometry, one FeatureCollection per zoom level.
+
+    Features keep their properties plus 'label' ([lat, lng]) and 'area', and
+    carry the geometry simplified for that zoom, so a client loads only the
+    level it draws. Returns {zoom: FeatureCollection}.
+    """
+    features = geojson["features"]
+    topology = Topology(features)
+
+    properties = []
+    for feature in features:
+        label, area = label_point(feature["geometry"])
+        properties.append(dict(feature.get("properties") or {}, label=label, area=area))
+
+    derived = {}
+    for zoom in sorted(set(zoom_levels) | {default_zoom}):
+        geometries = topology.simplified_geometries(features, zoom_tolerance(zoom))
+        derived[zoom] = {
+            "type": "FeatureCollection",
+            "zoom": zoom,
+            "features": [{"type": "Feature", "properties": p, "geometry": g} for p, g in zip(properties, geometries)],
+        }
+    return derived
+
+
+def zoom_file_name(output_file, zoom, default_zoom=DEFAULT_ZOOM):
+    """The default zoom is written to output_file, others next to it: 2024.derived.json -> 2024.z14.derived.json."""
+    if zoom == default_zoom:
+        return output_file
+    stem = output_file[:-len(".derived.json")] if output_file.endswith(".derived.json") else os.path.splitext(output_file)[0]
+    return f"{stem}.z{zoom}.derived.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute precinct label points, areas and simplified shapes.")
+    parser.add_argument("input_file", nargs="?", default="../2024.geojson", help="Precinct GeoJSON (default: ../2024.geojson)")
+    parser.add_argument("output_file", nargs="?",
+                        help="Output file for the default zoom; other zooms go to <stem>.z<zoom>.derived.json (default: <input>.derived.json)")
+    parser.add_argument("--zooms", default=",".join(str(z) for z in ZOOM_LEVELS),
+                        help=f"Comma separated zoom levels to simplify for (default: {','.join(str(z) for z in ZOOM_LEVELS)})")
+    parser.add_argument("--default-zoom", type=int, default=DEFAULT_ZOOM,
+                        help=f"Zoom level of the feature geometry (default: {DEFAULT_ZOOM})")
+    args = parser.parse_args()
+
+    output_file = args.output_file or f"{os.path.splitext(args.input_file)[0]}.derived.json"
+    with open(args.input_file, "r", encoding="utf-8") as f:
+        geojson = json.load(f)
+
+    derived = build_derived(geojson, [int(z) for z in args.zooms.split(",")], args.default_zoom)
+    for zoom, collection in derived.items():
+        zoom_file = zoom_file_name(output_file, zoom, args.default_zoom)
+        with open(zoom_file, "w", encoding="utf-8") as f:
+            json.dump(collection, f, separators=(",", ":"))
+        print(f"Derived geometry for {len(collection['features'])} precincts at zoom {zoom} written to {zoom_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import os
+import re
+import glob
+import json
+import argparse
+
+DEFAULT_OUTPUT = "../identity.json"
+
+# Columns that aggregate several people and never identify a candidate
+PSEUDO_CANDIDATES = ("Write-In", "WRITE-IN", "over", "under")
+
+
+def name_key(name):
+    """Lookup key for a display or SBE name: case-folded, commas dropped, spaces collapsed."""
+    return re.sub(r"\s+", " ", name.replace(",", "")).strip().casefold()
+
+
+def lineage_key(contest_name):
+    """Contests with the same office in different years share a lineage key."""
+    name = re.sub(r"\s*\((Unexpired|Partial Term)\)", "", contest_name, flags=re.IGNORECASE)
+    return name_key(name)
+
+
+class UnionFind:
+    """Groups names and ids that refer to the same person or office."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def build_identity_index(json_dir=".."):
+    """
+    Build the candidate and contest identity index from every <year>.json.
+
+    candidates maps a canonical key to each (year, contest, CSV column) the
+    candidate appeared in; aliases maps every known spelling (display name,
+    SBE name with commas, 'id:<candidate_id>') to that key. contests maps a
+    lineage key to the same office's contests across years, and
+    contest_lineage maps '<year>|<contest name>' back to it.
+    """
+    contests = []
+    for path in sorted(glob.glob(os.path.join(json_dir, "[0-9][0-9][0-9][0-9].json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            contests.extend(json.load(f)["contests"])
+
+    # 1. Link every spelling and id of a candidate, and every office by name or contest_id
+    people = UnionFind()
+    offices = UnionFind()
+    for contest in contests:
+        office = f"office:{lineage_key(contest['name'])}"
+        offices.find(office)
+        if contest.get("contest_id"):
+            offices.union(office, f"id:{contest['contest_id']}")
+        for candidate in contest["candidates"]:
+            if candidate["name"] in PSEUDO_CANDIDATES:
+                continue
+            person = f"name:{name_key(candidate['name'])}"
+            people.find(person)
+            if candidate.get("raw_name"):
+                people.union(person, f"name:{name_key(candidate['raw_name'])}")
+            if candidate.get("candidate_id"):
+                people.union(person, f"id:{candidate['candidate_id']}")
+
+    # 2. Canonical keys are the smallest name in each group
+    def canonical_keys(groups, prefix):
+        keys = {}
+        for member in sorted(groups.parent):
+            if member.startswith(prefix):
+                keys.setdefault(groups.find(member), member[len(prefix):])
+        return keys
+
+    people_keys = canonical_keys(people, "name:")
+    office_keys = canonical_keys(offices, "office:")
+
+    candidates = {}
+    aliases = {}
+    lineage = {}
+    contest_lineage = {}
+    for contest in contests:
+        office = office_keys[offices.find(f"office:{lineage_key(contest['name'])}")]
+        lineage.setdefault(office, []).append({
+            "year": contest["year"],
+            "name": contest["name"],
+            "csv_file": contest["csv_file"],
+            "contest_id": contest.get("contest_id"),
+        })
+        contest_lineage[f"{contest['year']}|{contest['name']}"] = office
+
+        for candidate in contest["candidates"]:
+            if candidate["name"] in PSEUDO_CANDIDATES:
+                continue
+            key = people_keys[people.find(f"name:{name_key(candidate['name'])}")]
+
+            entry = candidates.setdefault(key, {"names": [], "appearances": []})
+            if candidate["name"] not in entry["names"]:
+                entry["names"].append(candidate["name"])
+            entry["appearances"].append({
+                "year": contest["year"],
+                "contest": contest["name"],
+                "csv_file": contest["csv_file"],
+                "column": candidate.get("column", candidate["name"]),
+                "party": candidate.get("political_party", ""),
+            })
+
+            aliases[name_key(candidate["name"])] = key
+            if candidate.get("raw_name"):
+                aliases[name_key(candidate["raw_name"])] = key
+            if candidate.get("candidate_id"):
+                aliases[f"id:{candidate['candidate_id']}"] = key
+
+    for office in lineage.values():
+        office.sort(key=lambda c: c["year"])
+
+    return {
+        "candidates": candidates,
+        "aliases": aliases,
+        "contests": lineage,
+        "contest_lineage": contest_lineage,
+    }
+
+
+class IdentityIndex:
+    """O(1) lookups over a saved identity index."""
+
+    def __init__(self, index):
+        self.index = index
+
+    @classmethod
+    def load(cls, path=DEFAULT_OUTPUT):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def resolve(self, name_or_id):
+        """Canonical key for a display name, SBE name or candidate id (as 'id:<n>')."""
+        key = name_or_id if name_or_id.startswith("id:") else name_key(name_or_id)
+        return self.index["aliases"].get(key)
+
+    def races(self, name_or_id):
+        """Every (year, contest, CSV column) a candidate appeared in."""
+        key = self.resolve(name_or_id)
+        return self.index["candidates"][key]["appearances"] if key else []
+
+    def lineage(self, year, contest_name):
+        """The same office's contests in every year."""
+        office = self.index["contest_lineage"].get(f"{year}|{contest_name}")
+        return self.index["contests"][office] if office else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cross-year candidate and contest identity index.")
+    parser.add_argument("output_file", nargs="?", default=DEFAULT_OUTPUT, help=f"Output JSON (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--json-dir", default="..", help="Directory containing <year>.json (default: ..)")
+    args = parser.parse_args()
+
+    index = build_identity_index(args.json_dir)
+    with open(args.output_file, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"), ensure_ascii=False)
+
+    print(f"Indexed {len(index['candidates'])} candidates and {len(index['contests'])} offices in {args.output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import os
+import sys
+import glob
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import optimize
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from wakeresults.cache import year_inputs, inputs_hash
+from wakeresults.contests import NON_CANDIDATES
+from tensor import build_year_tensor
+
+CACHE_DIR = "inference"
+
+# Bump when the estimates change for the same inputs
+ENGINE_VERSION = 2
+
+# Weight of the sum-to-one rows relative to the square root of a contest's largest eigenvalue
+EQUALITY_WEIGHT = 1e3
+
+# Ridge pull toward the contest-wide shares, relative to each contest's largest eigenvalue;
+# directions the precincts cannot identify (tiny or collinear groups) settle there
+RIDGE = 1e-4
+
+# Contests whose weighted design (X' diag(T) X) has a larger condition number are flagged
+ILL_CONDITIONED = 1e6
+
+# demoturnout column prefixes; each dimension's groups partition a precinct's voters
+DIMENSIONS = ("gender", "race", "ethnic", "party")
+
+
+def load_groups(year, data_dir="."):
+    """
+    Read demoturnout<year>.csv as (precinct ids, {dimension: (groups, voted counts)}).
+
+    Counts are the *_voted columns, so each dimension describes the precinct's
+    actual electorate rather than its registered voters.
+    """
+    df = pd.read_csv(os.path.join(data_dir, f"demoturnout{year}.csv"), dtype={"id": str})
+    dims = {}
+    for dim in DIMENSIONS:
+        columns = [c for c in df.columns if c.startswith(f"{dim}_") and c.endswith("_voted")]
+        if columns:
+            groups = [c[len(dim) + 1:-len("_voted")] for c in columns]
+            dims[dim] = (groups, df[columns].to_numpy(dtype=np.float64))
+    return df["id"].to_numpy(dtype=str), dims
+
+
+def bounded_estimates(lhs, rhs, contest_of_column, start):
+    """
+    Weighted least squares for every contest subject to each group's shares
+    being non-negative and summing to one across the contest's candidates
+    (so also at most one), as one small NNLS problem per contest.
+
+    The normal equations are factored once for all contests (lhs + ridge =
+    R'R, stacked Cholesky), so each problem is ||R b_k - d_k|| over the
+    contest's candidates with the sum-to-one rows appended at a large
+    weight. The small ridge pulls directions the precincts cannot identify
+    (tiny or collinear groups) toward start, the contest-wide shares.
+    lhs is contests x groups x groups, rhs and start candidates x groups.
+    """
+    n_groups = lhs.shape[1]
+    largest = np.linalg.eigvalsh(lhs)[:, -1]
+    ridge = RIDGE * np.where(largest > 0, largest, 1.0)
+    chol = np.linalg.cholesky(lhs + ridge[:, None, None] * np.eye(n_groups))  # R' (lower)
+    targets = np.linalg.solve(chol[contest_of_column], (rhs + ridge[contest_of_column][:, None] * start)[:, :, None])[:, :, 0]
+
+    estimates = np.empty_like(start)
+    for c in range(len(lhs)):
+        cols = np.flatnonzero(contest_of_column == c)
+        if not len(cols):
+            continue
+        weight = EQUALITY_WEIGHT * np.sqrt(ridge[c] / RIDGE)
+        design = np.vstack([np.kron(np.eye(len(cols)), chol[c].T), weight * np.tile(np.eye(n_groups), len(cols))])
+        target = np.concatenate([targets[cols].ravel(), np.full(n_groups, weight)])
+        solution = optimize.nnls(design, target, maxiter=50 * design.shape[1])[0].reshape(len(cols), n_groups)
+        estimates[cols] = solution / np.where(solution.sum(axis=0) > 0, solution.sum(axis=0), 1.0)
+    return estimates
+
+
+def estimate_year(year, json_dir="..", data_dir="."):
+    """
+    Goodman ecological regression for every contest of a year at once.
+
+    For each dimension, a candidate's precinct vote share is regressed on the
+    precinct's group composition, weighted by the contest's precinct vote
+    total. With X the precinct x group composition and T the precinct x
+    contest totals, the normal equations for every contest are
+
+        (X' diag(T[:, c]) X) beta = X' V[:, k]
+
+    so the left-hand sides for all contests are one einsum and the right-hand
+    sides for all candidates one matrix product. Unconstrained, these give
+    shares far outside 0-1, so every contest is solved together under the
+    constraint that each group's shares are in [0, 1] and sum to one across
+    the contest's candidates (see bounded_estimates); groups without voters
+    keep the contest-wide shares. Estimates are the share of each group's
+    voters who voted for each candidate.
+
+    <dim>_constrained marks the (candidate, group) estimates whose
+    unconstrained value was outside 0-1, and <dim>_condition holds each
+    contest's condition number; above ILL_CONDITIONED the design cannot
+    separate the groups and the estimates rest mostly on the constraint.
+    """
+    tensor = build_year_tensor(year, json_dir, data_dir)
+    demo_ids, dims = load_groups(year, data_dir)
+
+    # 1. Align precincts once: rows present in both the contests and the demoturnout file
+    demo_rows = pd.Index(demo_ids).get_indexer(tensor["precincts"])
+    keep = demo_rows >= 0
+    demo_rows = demo_rows[keep]
+
+    # 2. Candidate columns (no over/under) and precinct x contest vote totals
+    columns = np.flatnonzero(~np.isin(tensor["candidates"], NON_CANDIDATES))
+    votes = tensor["votes"][keep][:, columns].astype(np.float64)
+    contest_of_column = tensor["contest_of_column"][columns]
+    n_contests = len(tensor["contests"])
+    membership = np.zeros((len(columns), n_contests))
+    membership[np.arange(len(columns)), contest_of_column] = 1.0
+    totals = votes @ membership
+    overall = votes.sum(axis=0) / np.maximum((votes.sum(axis=0) @ membership)[contest_of_column], 1.0)
+
+    result = {
+        "year": np.int32(year),
+        "contests": tensor["contests"],
+        "candidates": tensor["candidates"][columns],
+        "contest_of_column": contest_of_column.astype(np.int32),
+        "precincts": tensor["precincts"][keep],
+    }
+
+    # 3. One stacked solve per dimension
+    for dim, (groups, counts) in dims.items():
+        counts = counts[demo_rows]
+        voters = counts.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            composition = np.where(voters > 0, counts / voters, 0.0)
+
+        lhs = np.einsum("pg,pc,ph->cgh", composition, totals, composition)
+        rhs = composition.T @ votes
+        unconstrained = (np.linalg.pinv(lhs)[contest_of_column] @ rhs.T[:, :, None])[:, :, 0]
+        start = np.repeat(overall[:, None], len(groups), axis=1)
+        estimates = bounded_estimates(lhs, rhs.T, contest_of_column, start)
+
+        result[f"{dim}_groups"] = np.array(groups, dtype=str)
+        result[f"{dim}_estimates"] = estimates
+        result[f"{dim}_constrained"] = (unconstrained < 0) | (unconstrained > 1)
+        result[f"{dim}_condition"] = np.linalg.cond(lhs)
+        # Estimated voters from each group in each contest, to judge how much an estimate rests on
+        result[f"{dim}_voters"] = (composition.T @ totals).T
+
+    return result
+
+
+def infer_year(year, json_dir="..", data_dir=".", cache_dir=CACHE_DIR, force=False):
+    """
+    Estimates for a year, from <cache_dir>/<year>-<input hash>.npz when the
+    inputs are unchanged. Returns the path of the cached file.
+    """
+    digest = inputs_hash(year_inputs(year, json_dir, data_dir), ENGINE_VERSION)[:16]
+    output_file = os.path.join(cache_dir, f"{year}-{digest}.npz")
+    if not force and os.path.exists(output_file):
+        return output_file
+
+    arrays = estimate_year(year, json_dir, data_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(cache_dir, f"{year}-*.npz")):
+        os.remove(stale)
+    np.savez_compressed(output_file, **arrays)
+    return output_file
+
+
+class YearInference:
+    """Query API over a cached estimates file."""
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.year = int(arrays["year"])
+        self.contests = arrays["contests"]
+        self.candidates = arrays["candidates"]
+        self.contest_of_column = arrays["contest_of_column"]
+        self._contest_index = {name: i for i, name in enumerate(self.contests)}
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({key: arrays[key] for key in arrays.files})
+
+    def dimensions(self):
+        return [dim for dim in DIMENSIONS if f"{dim}_groups" in self.arrays]
+
+    def table(self, contest, dimension):
+        """Candidates x groups DataFrame of estimated vote shares for one contest."""
+        cols = np.flatnonzero(self.contest_of_column == self._contest_index[contest])
+        return pd.DataFrame(
+            self.arrays[f"{dimension}_estimates"][cols],
+            index=self.candidates[cols],
+            columns=self.arrays[f"{dimension}_groups"],
+        )
+
+    def flags(self, contest, dimension):
+        """
+        Candidates x groups DataFrame, True where the unconstrained estimate was
+        outside 0-1 or the contest's design is ill-conditioned.
+        """
+        c = self._contest_index[contest]
+        cols = np.flatnonzero(self.contest_of_column == c)
+        flagged = self.arrays[f"{dimension}_constrained"][cols] | (self.arrays[f"{dimension}_condition"][c] > ILL_CONDITIONED)
+        return pd.DataFrame(flagged, index=self.candidates[cols], columns=self.arrays[f"{dimension}_groups"])
+
+    def group_voters(self, contest, dimension):
+        """Estimated number of voters from each group who voted in the contest."""
+        return pd.Series(
+            self.arrays[f"{dimension}_voters"][self._contest_index[contest]],
+            index=self.arrays[f"{dimension}_groups"],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate how demographic groups voted in every contest of a year.")
+    parser.add_argument("years", nargs="+", type=int, help="Election years to estimate")
+    parser.add_argument("--json-dir", default="..", help="Directory containing <year>.json (default: ..)")
+    parser.add_argument("--data-dir", default=".", help="Directory containing the CSVs (default: .)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help=f"Cache directory (default: {CACHE_DIR})")
+    parser.add_argument("--force", action="store_true", help="Recompute even if the inputs are unchanged")
+    parser.add_argument("--contest", help="Print the estimates for this contest")
+    args = parser.parse_args()
+
+    for year in args.years:
+        output_file = infer_year(year, args.json_dir, args.data_dir, args.cache_dir, args.force)
+        inference = YearInference.load(output_file)
+        print(f"{year}: {len(inference.contests)} contests in {output_file}")
+        if args.contest in inference.contests:
+            for dim in inference.dimensions():
+                # Flagged estimates are starred
+                table = inference.table(args.contest, dim).round(3).astype(str)
+                print(table.where(~inference.flags(args.contest, dim), table + "*").to_string())
+
+if __name__ == "__main__":
+    main()
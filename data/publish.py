@@ -0,0 +1,181 @@
+import os
+import re
+import glob
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped without the brotli package
+    brotli = None
+
+# Static pages and scripts keep their names; everything they load is hashed
+PAGE_PATTERNS = ["*.html", "*.js", "*.css", "*.png", "CNAME"]
+
+# Extensions worth precompressing
+COMPRESSIBLE = (".json", ".geojson", ".csv", ".html", ".js", ".css")
+
+# Length of the content hash added to file names
+HASH_LENGTH = 10
+
+# A content-hashed output name (or its .gz/.br sibling), e.g. 2024.0123456789.json.gz
+HASHED_NAME = re.compile(r"\.[0-9a-f]{%d}\.[^./]+(\.gz|\.br)?$" % HASH_LENGTH)
+
+
+def content_hash(data):
+    """Short sha256 of a file's bytes."""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path, data):
+    """Insert the content hash before the extension: 2024.json -> 2024.<hash>.json."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{content_hash(data)}{ext}"
+
+
+def rewrite_references(value, renames):
+    """Replace every string in a JSON value that names a renamed file."""
+    if isinstance(value, dict):
+        return {k: rewrite_references(v, renames) for k, v in value.items()}
+    if isinstance(value, list):
+        return [rewrite_references(v, renames) for v in value]
+    if isinstance(value, str):
+        return renames.get(value, value)
+    return value
+
+
+def minify_json(path, renames):
+    """Load a JSON file, point its file references at hashed names and minify it."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = rewrite_references(json.load(f), renames)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def compress(path):
+    """Write .gz and (when available) .br siblings at maximum compression."""
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(f"{path}.gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(f"{path}.br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+    return path
+
+
+def write_output(out_dir, relative_path, data):
+    path = os.path.join(out_dir, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def retain_hashed(previous_dir, staging):
+    """
+    Copy content-hashed files of the previous build that the new one no
+    longer produces, so shared map URLs and cached year JSONs that name them
+    keep working. Returns the number of files kept.
+    """
+    kept = 0
+    for root, _, files in os.walk(previous_dir):
+        relative_dir = os.path.relpath(root, previous_dir)
+        for name in files:
+            target = os.path.normpath(os.path.join(staging, relative_dir, name))
+            if HASHED_NAME.search(name) and not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(root, name), target)
+                kept += 1
+    return kept
+
+
+def publish(site_dir, out_dir, workers=None):
+    """
+    Build a deployable copy of the site in out_dir.
+
+    Data files (data/*.csv, root *.json, *.geojson and shapes/*.geojson) get
+    content-hashed names and JSON is minified with its file references
+    rewritten; pages and scripts keep their names. manifest.json maps every
+    original name to its hashed name, and the pages resolve the stable names
+    in links through it. Hashed files of the previous build in out_dir are kept, as
+    links to them may still be in use. Returns the manifest.
+    """
+    staging = f"{out_dir}.new"
+    shutil.rmtree(staging, ignore_errors=True)
+    manifest = {}
+    written = []
+
+    # 1. Hash the data CSVs first; nothing they contain refers to other files
+    renames = {}
+    for path in sorted(glob.glob(os.path.join(site_dir, "data", "*.csv"))):
+        with open(path, "rb") as f:
+            data = f.read()
+        name = hashed_name(os.path.basename(path), data)
+        renames[os.path.basename(path)] = name
+        manifest[f"data/{os.path.basename(path)}"] = f"data/{name}"
+        written.append(write_output(staging, os.path.join("data", name), data))
+
+    # 2. GeoJSON shapes are referenced by name from the pages (the map loads shapes/<file>)
+    shapes = glob.glob(os.path.join(site_dir, "*.geojson")) + glob.glob(os.path.join(site_dir, "*.derived.json"))
+    shapes += glob.glob(os.path.join(site_dir, "shapes", "*.geojson"))
+    for path in sorted(shapes):
+        data = minify_json(path, {})
+        relative_path = os.path.relpath(path, site_dir).replace(os.sep, "/")
+        name = hashed_name(relative_path, data)
+        renames[os.path.basename(path)] = os.path.basename(name)
+        manifest[relative_path] = name
+        written.append(write_output(staging, name, data))
+
+    # 3. Minify the year and turnout JSONs, pointing them at the hashed CSVs
+    for path in sorted(glob.glob(os.path.join(site_dir, "*.json"))):
+        if path.endswith(".derived.json") or os.path.basename(path) == "manifest.json":
+            continue
+        data = minify_json(path, renames)
+        name = hashed_name(os.path.basename(path), data)
+        manifest[os.path.basename(path)] = name
+        written.append(write_output(staging, name, data))
+
+    # 4. Pages, scripts and images keep stable names
+    for pattern in PAGE_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(site_dir, pattern))):
+            with open(path, "rb") as f:
+                written.append(write_output(staging, os.path.basename(path), f.read()))
+
+    manifest_data = json.dumps(manifest, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    written.append(write_output(staging, "manifest.json", manifest_data))
+
+    # 5. Precompress everything compressible on a worker pool
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(compress, [p for p in written if p.endswith(COMPRESSIBLE)], chunksize=16))
+
+    # 6. Keep the previous build's hashed files, then swap the finished tree into place
+    if os.path.isdir(out_dir):
+        retain_hashed(out_dir, staging)
+    previous = f"{out_dir}.old"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.rename(out_dir, previous)
+    os.rename(staging, out_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a minified, precompressed, content-addressed copy of the site.")
+    parser.add_argument("--site-dir", default="..", help="Site root containing the pages and data/ (default: ..)")
+    parser.add_argument("--out-dir", default="../dist", help="Output directory (default: ../dist)")
+    parser.add_argument("--workers", type=int, help="Compression worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli is not installed; writing .gz siblings only.")
+    manifest = publish(args.site_dir, args.out_dir, args.workers)
+    print(f"Published {len(manifest)} hashed files to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import os
+import csv
+import glob
+import json
+import asyncio
+import hashlib
+import argparse
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+# Responses kept in the LRU cache
+RESPONSE_CACHE_SIZE = 512
+
+# Requests larger than this are rejected
+MAX_HEADER_BYTES = 16384
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class ResultsStore:
+    """
+    In-memory index of every year JSON and contest CSV.
+
+    contests maps (year, contest name) to its JSON entry plus the precinct
+    rows; by_precinct maps a precinct id to the contests it voted in.
+    """
+
+    def __init__(self, json_dir="..", data_dir="."):
+        self.contests = {}
+        self.by_precinct = {}
+        self.tables = {}  # csv_file -> (columns, {precinct: [counts]})
+
+        for json_file in sorted(glob.glob(os.path.join(json_dir, "*.json"))):
+            with open(json_file, "r", encoding="utf-8") as f:
+                try:
+                    contests = json.load(f).get("contests", [])
+                except (ValueError, AttributeError):
+                    continue  # Not a results file
+            for contest in contests:
+                csv_path = os.path.join(data_dir, contest.get("csv_file", ""))
+                if "year" not in contest or not os.path.isfile(csv_path):
+                    continue
+                key = (str(contest["year"]), contest["name"])
+                self.contests[key] = contest
+                columns, rows = self.load_table(contest["csv_file"], csv_path)
+                for precinct in rows:
+                    self.by_precinct.setdefault(precinct, []).append(key)
+
+    def load_table(self, csv_file, csv_path):
+        """Parse a contest or turnout CSV once, however many contests share it."""
+        if csv_file not in self.tables:
+            with open(csv_path, "r", encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader)
+                rows = {}
+                for row in reader:
+                    rows[row[0]] = [float(v) if "." in v else int(v) for v in row[1:]]
+            self.tables[csv_file] = (header[1:], rows)
+        return self.tables[csv_file]
+
+    def list_contests(self, year=None):
+        return [
+            {k: v for k, v in contest.items() if k != "candidates"}
+            for (contest_year, _), contest in sorted(self.contests.items())
+            if year is None or contest_year == year
+        ]
+
+    def contest_slice(self, year, name, precincts=None, candidates=None):
+        """Rows of one contest, limited to the requested precincts and columns."""
+        contest = self.contests.get((year, name))
+        if contest is None:
+            return None
+        columns, rows = self.tables[contest["csv_file"]]
+        indexes = [i for i, c in enumerate(columns) if not candidates or c in candidates]
+        selected = precincts if precincts else sorted(rows)
+        return {
+            "year": contest["year"],
+            "name": contest["name"],
+            "columns": [columns[i] for i in indexes],
+            "rows": {p: [rows[p][i] for i in indexes] for p in selected if p in rows},
+        }
+
+    def precinct_results(self, precinct, year=None):
+        """Every contest a precinct voted in, with its row of counts."""
+        results = []
+        for contest_year, name in self.by_precinct.get(precinct, []):
+            if year is None or contest_year == year:
+                contest = self.contests[(contest_year, name)]
+                columns, rows = self.tables[contest["csv_file"]]
+                results.append({
+                    "year": contest["year"],
+                    "name": name,
+                    "columns": columns,
+                    "counts": rows[precinct],
+                })
+        return results
+
+
+class ResultsService:
+    """Routes queries to the store and caches serialized responses."""
+
+    def __init__(self, store, cache_size=RESPONSE_CACHE_SIZE):
+        self.store = store
+        self.cache = OrderedDict()  # request target -> (status, body, etag)
+        self.cache_size = cache_size
+
+    def route(self, path, query):
+        def one(name):
+            return query.get(name, [None])[0]
+
+        def many(name):
+            value = one(name)
+            return [v for v in value.split(",") if v] if value else None
+
+        if path == "/contests":
+            return 200, self.store.list_contests(one("year"))
+        if path == "/contest":
+            if not one("year") or not one("name"):
+                return 400, {"error": "year and name are required"}
+            result = self.store.contest_slice(one("year"), one("name"), many("precincts"), many("candidates"))
+            return (200, result) if result else (404, {"error": "no such contest"})
+        if path == "/precinct":
+            if not one("id"):
+                return 400, {"error": "id is required"}
+            return 200, self.store.precinct_results(one("id"), one("year"))
+        return 404, {"error": "not found"}
+
+    def respond(self, target):
+        """Return (status, body, etag) for a request target, using the LRU cache."""
+        if target in self.cache:
+            self.cache.move_to_end(target)
+            return self.cache[target]
+
+        parts = urlsplit(target)
+        status, payload = self.route(parts.path, parse_qs(parts.query))
+        body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        response = (status, body, f'"{hashlib.sha1(body).hexdigest()}"')
+
+        if status == 200:
+            self.cache[target] = response
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return response
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 GET requests on one connection until it closes."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = (lines[0].split(" ") + ["", ""])[:3]
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                if method not in ("GET", "HEAD"):
+                    status, body, etag = 405, b'{"error":"method not allowed"}', None
+                else:
+                    status, body, etag = self.respond(target)
+                    if etag and headers.get("if-none-match") == etag:
+                        status, body = 304, b""
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                response_headers = [
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+                    "Content-Type: application/json; charset=utf-8",
+                    f"Content-Length: {len(body)}",
+                    "Cache-Control: no-cache",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ]
+                if etag:
+                    response_headers.append(f"ETag: {etag}")
+                writer.write(("\r\n".join(response_headers) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+
+async def start_server(store, host="127.0.0.1", port=8000, cache_size=RESPONSE_CACHE_SIZE):
+    """Start the service; port 0 picks a free port (see server.sockets)."""
+    service = ResultsService(store, cache_size)
+    return await asyncio.start_server(service.handle, host, port, limit=MAX_HEADER_BYTES)
+
+
+async def serve(args):
+    store = ResultsStore(args.json_dir, args.data_dir)
+    server = await start_server(store, args.host, args.port, args.cache_size)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"Loaded {len(store.contests)} contests, serving on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve contest and precinct result slices from an in-memory index.")
+    parser.add_argument("--json-dir", default="..", help="Directory containing the year JSON files (default: ..)")
+    parser.add_argument("--data-dir", default=".", help="Directory containing the contest CSVs (default: .)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--cache-size", type=int, default=RESPONSE_CACHE_SIZE,
+                        help=f"Responses kept in the LRU cache (default: {RESPONSE_CACHE_SIZE})")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import glob
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from wakeresults.cache import year_inputs, inputs_hash
+from wakeresults.contests import NON_CANDIDATES
+from tensor import build_year_tensor
+
+INDEX_DIR = "similarity"
+
+# Neighbors precomputed per precinct; larger queries fall back to a dot product
+NEIGHBORS = 50
+
+# Contests on at least this share of a year's precincts are used as features
+COUNTYWIDE = 0.95
+
+# demoturnout groups used as features (each as a share of the precinct's voters)
+DIMENSIONS = ("gender", "race", "ethnic", "party")
+
+
+def zscore(block):
+    """Standardize columns, filling missing values with the column mean (0 after scaling)."""
+    mean = np.nanmean(block, axis=0)
+    std = np.nanstd(block, axis=0)
+    std[~(std > 0)] = 1.0
+    return np.nan_to_num((block - mean) / std)
+
+
+def year_features(year, json_dir="..", data_dir="."):
+    """
+    Normalized feature vector for every precinct of a year.
+
+    Features are the candidate vote shares of every countywide contest plus,
+    from demoturnout<year>.csv, turnout and each group's share of voters.
+    Columns are standardized, each of the two blocks is scaled to the same
+    total weight and rows are unit length, so cosine similarity is a dot
+    product. Returns (precinct ids, features, feature names).
+    """
+    tensor = build_year_tensor(year, json_dir, data_dir)
+    votes = tensor["votes"].astype(np.float64)
+    present = tensor["present"]
+
+    # 1. Vote shares in countywide contests
+    shares, names = [], []
+    for i in np.flatnonzero(present.mean(axis=0) >= COUNTYWIDE):
+        cols = np.flatnonzero((tensor["contest_of_column"] == i) & ~np.isin(tensor["candidates"], NON_CANDIDATES))
+        totals = votes[:, cols].sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = votes[:, cols] / totals
+        share[~present[:, i]] = np.nan
+        shares.append(share)
+        names.extend(f"{tensor['contests'][i]}:{c}" for c in tensor["candidates"][cols])
+
+    # 2. Turnout and demographic ratios, aligned to the contest precincts
+    demo = pd.read_csv(os.path.join(data_dir, f"demoturnout{year}.csv"), dtype={"id": str}).set_index("id")
+    demo = demo.reindex(tensor["precincts"]).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratios = [demo["voted_total"] / demo["total"]]
+        ratio_names = ["turnout"]
+        for dim in DIMENSIONS:
+            for column in [c for c in demo.columns if c.startswith(f"{dim}_") and c.endswith("_voted")]:
+                ratios.append(demo[column] / demo["voted_total"])
+                ratio_names.append(column[:-len("_voted")])
+    ratios = np.column_stack(ratios)
+
+    # 3. Standardize, balance the two blocks and normalize rows
+    blocks = []
+    for block in (np.column_stack(shares) if shares else np.empty((len(votes), 0)), ratios):
+        if block.shape[1]:
+            blocks.append(zscore(block) / np.sqrt(block.shape[1]))
+    features = np.column_stack(blocks)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    features = np.divide(features, norms, out=np.zeros_like(features), where=norms > 0)
+
+    return tensor["precincts"], features.astype(np.float32), np.array(names + ratio_names, dtype=str)
+
+
+def build_year_index(year, json_dir="..", data_dir="."):
+    """Feature vectors plus each precinct's NEIGHBORS most similar precincts."""
+    precincts, features, names = year_features(year, json_dir, data_dir)
+    similarity = features @ features.T
+    np.fill_diagonal(similarity, -np.inf)
+
+    k = min(NEIGHBORS, len(precincts) - 1)
+    neighbors = np.argpartition(-similarity, k - 1, axis=1)[:, :k] if k > 0 else np.empty((len(precincts), 0), dtype=np.intp)
+    scores = np.take_along_axis(similarity, neighbors, axis=1)
+    order = np.argsort(-scores, axis=1)
+
+    return {
+        "year": np.int32(year),
+        "precincts": precincts,
+        "features": features,
+        "feature_names": names,
+        "neighbors": np.take_along_axis(neighbors, order, axis=1).astype(np.int32),
+        "scores": np.take_along_axis(scores, order, axis=1).astype(np.float32),
+    }
+
+
+def build_index(years, json_dir="..", data_dir=".", index_dir=INDEX_DIR, force=False):
+    """
+    Build or refresh <index_dir>/<year>.npz for each year.
+
+    manifest.json records the input hash of every year; only years whose
+    outputs changed are rebuilt. Returns the years that were rebuilt.
+    """
+    manifest_file = os.path.join(index_dir, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    rebuilt = []
+    os.makedirs(index_dir, exist_ok=True)
+    for year in years:
+        digest = inputs_hash(year_inputs(year, json_dir, data_dir))
+        output_file = os.path.join(index_dir, f"{year}.npz")
+        if not force and manifest.get(str(year)) == digest and os.path.exists(output_file):
+            continue
+        np.savez(output_file, **build_year_index(year, json_dir, data_dir))
+        manifest[str(year)] = digest
+        rebuilt.append(year)
+
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return rebuilt
+
+
+class SimilarityIndex:
+    """
+    Top-k similar precinct queries over the saved indexes.
+
+    Years are loaded on first use; a query up to NEIGHBORS results is a row
+    lookup, larger ones a single matrix-vector product.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self.years = {}
+
+    def year(self, year):
+        if year not in self.years:
+            with np.load(os.path.join(self.index_dir, f"{year}.npz")) as arrays:
+                data = {key: arrays[key] for key in arrays.files}
+            data["row_of"] = {p: i for i, p in enumerate(data["precincts"])}
+            self.years[year] = data
+        return self.years[year]
+
+    def available_years(self):
+        return sorted(int(os.path.basename(p)[:4]) for p in glob.glob(os.path.join(self.index_dir, "[0-9][0-9][0-9][0-9].npz")))
+
+    def similar(self, precinct, year, k=10):
+        """
+        [(precinct, cosine similarity)] for the k precincts most like precinct
+        in year, never the precinct itself; k is capped at the other precincts.
+        """
+        data = self.year(year)
+        row = data["row_of"][precinct]
+        k = min(k, len(data["precincts"]) - 1)
+        if k <= data["neighbors"].shape[1]:
+            neighbors, scores = data["neighbors"][row, :k], data["scores"][row, :k]
+        else:
+            others = np.delete(np.arange(len(data["precincts"])), row)
+            similarity = data["features"][others] @ data["features"][row]
+            top = np.argsort(-similarity, kind="stable")[:k]
+            neighbors, scores = others[top], similarity[top]
+        return [(data["precincts"][i], float(s)) for i, s in zip(neighbors, scores)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precinct similarity index and query it.")
+    parser.add_argument("years", nargs="*", type=int, help="Years to index (default: every <year>.json with a demoturnout CSV)")
+    parser.add_argument("--json-dir", default="..", help="Directory containing <year>.json (default: ..)")
+    parser.add_argument("--data-dir", default=".", help="Directory containing the CSVs (default: .)")
+    parser.add_argument("--index-dir", default=INDEX_DIR, help=f"Index directory (default: {INDEX_DIR})")
+    parser.add_argument("--force", action="store_true", help="Rebuild every year even if its inputs are unchanged")
+    parser.add_argument("--query", help="Precinct id to look up, e.g. 01-07")
+    parser.add_argument("--year", type=int, help="Year to query (default: latest indexed)")
+    parser.add_argument("-k", type=int, default=10, help="Number of similar precincts (default: 10)")
+    args = parser.parse_args()
+
+    years = args.years or sorted(
+        int(os.path.basename(p)[:4]) for p in glob.glob(os.path.join(args.json_dir, "[0-9][0-9][0-9][0-9].json"))
+        if os.path.exists(os.path.join(args.data_dir, f"demoturnout{os.path.basename(p)[:4]}.csv"))
+    )
+    rebuilt = build_index(years, args.json_dir, args.data_dir, args.index_dir, args.force)
+    print(f"Rebuilt {len(rebuilt)} of {len(years)} years" + (f": {', '.join(map(str, rebuilt))}" if rebuilt else ""))
+
+    if args.query:
+        index = SimilarityIndex(args.index_dir)
+        year = args.year or index.available_years()[-1]
+        for precinct, score in index.similar(args.query, year, args.k):
+            print(f"  {precinct}  {score:.3f}")
+
+if __name__ == "__main__":
+    main()
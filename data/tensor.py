@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from wakeresults.contests import NON_CANDIDATES
+
+
+def build_year_tensor(year, json_dir="..", data_dir="."):
+    """
+    Build one aligned precinct x (contest, candidate) vote array for a year.
+
+    Every contest CSV listed in <json_dir>/<year>.json is read once and
+    scattered into a dense int32 matrix whose rows are the union of all
+    precinct ids seen that year (sorted) and whose columns are the contest
+    CSV columns in JSON order. Returns a dict of arrays ready for np.savez.
+    """
+    with open(os.path.join(json_dir, f"{year}.json"), "r", encoding="utf-8") as f:
+        contests = json.load(f)["contests"]
+
+    # 1. Read every contest table once
+    tables = []
+    for contest in contests:
+        df = pd.read_csv(os.path.join(data_dir, contest["csv_file"]), dtype={"id": str})
+        tables.append((contest["name"], df.set_index("id")))
+
+    # 2. Precinct axis is the union of every contest's rows
+    precincts = np.array(sorted(set().union(*(df.index for _, df in tables))))
+    row_of = pd.Index(precincts)
+
+    # 3. Scatter each contest into its column block
+    n_cols = sum(df.shape[1] for _, df in tables)
+    votes = np.zeros((len(precincts), n_cols), dtype=np.int32)
+    present = np.zeros((len(precincts), len(tables)), dtype=bool)
+    contest_of_column = np.empty(n_cols, dtype=np.int32)
+    candidates = []
+
+    col = 0
+    for i, (name, df) in enumerate(tables):
+        rows = row_of.get_indexer(df.index)
+        width = df.shape[1]
+        votes[rows, col:col + width] = df.to_numpy(dtype=np.int32)
+        present[rows, i] = True
+        contest_of_column[col:col + width] = i
+        candidates.extend(df.columns)
+        col += width
+
+    return {
+        "year": np.int32(year),
+        "votes": votes,
+        "present": present,
+        "precincts": precincts.astype(str),
+        "contests": np.array([name for name, _ in tables], dtype=str),
+        "candidates": np.array(candidates, dtype=str),
+        "contest_of_column": contest_of_column,
+    }
+
+
+def save_year_tensor(year, json_dir="..", data_dir=".", out_dir="."):
+    """Build the tensor for a year and write it to <out_dir>/<year>.npz."""
+    arrays = build_year_tensor(year, json_dir, data_dir)
+    output_file = os.path.join(out_dir, f"{year}.npz")
+    np.savez_compressed(output_file, **arrays)
+    return output_file
+
+
+class YearTensor:
+    """
+    Query API over a saved <year>.npz.
+
+    All per-precinct results are NumPy arrays aligned with self.precincts;
+    precincts that did not vote in a contest get NaN shares and margins.
+    """
+
+    def __init__(self, arrays):
+        self.year = int(arrays["year"])
+        self.votes = arrays["votes"]
+        self.present = arrays["present"]
+        self.precincts = arrays["precincts"]
+        self.contests = arrays["contests"]
+        self.candidates = arrays["candidates"]
+        self.contest_of_column = arrays["contest_of_column"]
+        self._contest_index = {name: i for i, name in enumerate(self.contests)}
+        self._precinct_index = {p: i for i, p in enumerate(self.precincts)}
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({key: arrays[key] for key in arrays.files})
+
+    def contest_columns(self, contest, include_over_under=False):
+        """Return (column indexes, candidate names) for a contest."""
+        cols = np.flatnonzero(self.contest_of_column == self._contest_index[contest])
+        if not include_over_under:
+            cols = cols[~np.isin(self.candidates[cols], NON_CANDIDATES)]
+        return cols, self.candidates[cols]
+
+    def precinct_rows(self, precincts):
+        """Map precinct ids to row indexes."""
+        return np.array([self._precinct_index[p] for p in precincts], dtype=np.intp)
+
+    def shares(self, contest, precincts=None):
+        """Vote share (0-1) of each candidate, excluding over/under votes."""
+        cols, names = self.contest_columns(contest)
+        counts = self.votes[:, cols].astype(np.float64)
+        totals = counts.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shares = counts / totals
+        shares[~self.present[:, self._contest_index[contest]]] = np.nan
+        if precincts is not None:
+            shares = shares[self.precinct_rows(precincts)]
+        return shares, names
+
+    def share(self, contest, candidate, precincts=None):
+        """Vote share of one candidate in every precinct."""
+        shares, names = self.shares(contest, precincts)
+        return shares[:, list(names).index(candidate)]
+
+    def margin(self, contest, precincts=None):
+        """Top-two share margin (winner share - runner-up share) per precinct."""
+        shares, _ = self.shares(contest, precincts)
+        if shares.shape[1] < 2:
+            return np.where(np.isnan(shares[:, 0]), np.nan, shares[:, 0])
+        top_two = -np.partition(-np.nan_to_num(shares, nan=-1), 1, axis=1)[:, :2]
+        return np.where(np.isnan(shares).all(axis=1), np.nan, top_two[:, 0] - top_two[:, 1])
+
+    def correlation(self, columns):
+        """
+        Pearson correlation matrix between (contest, candidate) share columns,
+        computed over precincts that voted in all of the requested contests.
+        """
+        stacked = np.column_stack([self.share(contest, candidate) for contest, candidate in columns])
+        stacked = stacked[~np.isnan(stacked).any(axis=1)]
+        return np.corrcoef(stacked, rowvar=False)
+
+
+def share_shift(before, after, contest_before, contest_after, candidate_before, candidate_after=None):
+    """
+    Change in a candidate's (or party's) share between two years, aligned on
+    the precincts both years have in common.
+
+    Returns (precincts, delta) sorted by largest absolute movement first.
+    """
+    common = np.intersect1d(before.precincts, after.precincts)
+    delta = (after.share(contest_after, candidate_after or candidate_before, common)
+             - before.share(contest_before, candidate_before, common))
+    keep = ~np.isnan(delta)
+    common, delta = common[keep], delta[keep]
+    order = np.argsort(-np.abs(delta))
+    return common[order], delta[order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build dense per-year precinct x candidate vote arrays (.npz).")
+    parser.add_argument("years", nargs="+", type=int, help="Election years to build")
+    parser.add_argument("--json-dir", default="..", help="Directory containing <year>.json (default: ..)")
+    parser.add_argument("--data-dir", default=".", help="Directory containing the contest CSVs (default: .)")
+    parser.add_argument("--out-dir", default=".", help="Directory to write <year>.npz into (default: .)")
+    args = parser.parse_args()
+
+    for year in args.years:
+        output_file = save_year_tensor(year, args.json_dir, args.data_dir, args.out_dir)
+        print(f"Tensor written to {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""Same as `wakeresults validate` run from data/; the code lives in wakeresults/validate.py."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from wakeresults.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["validate", "--json-dir", "..", "--data-dir", "."] + sys.argv[1:]))
@@ -1,6 +1,19 @@
+import os
+import re
+import queue
+import threading
+from functools import lru_cache
+
 import pandas as pd
 import tkinter as tk
-from tkinter import ttk, filedialog
+from tkinter import ttk, filedialog, simpledialog
+
+# Precinct key column names used by the demoturnout CSVs (agg2.py writes
+# 'precinct_abbrv', the published data/ files use 'id')
+PRECINCT_COLUMNS = ("precinct_abbrv", "id")
+
+# Number of parsed turnout frames kept in memory
+FRAME_CACHE_SIZE = 16
 
 class Tooltip:
     """Tooltip for Treeview cells."""
@@ -38,6 +51,99 @@ def calculate_turnout(input_file):
     return data
 
 
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
+def _load_turnout_cached(input_file, mtime):
+    """Parse a turnout CSV once per (path, mtime) pair."""
+    return calculate_turnout(input_file)
+
+
+def load_turnout(input_file):
+    """
+    Return the turnout dataframe for input_file, reusing a cached parse when
+    the file has not been modified since it was last read.
+    """
+    input_file = os.path.abspath(input_file)
+    frame = _load_turnout_cached(input_file, os.path.getmtime(input_file))
+    return frame.copy()  # Callers add columns; keep the cached frame pristine
+
+
+def year_from_filename(file_path):
+    """
+    Extract the four digit year from a file name like demoturnout2020.csv, or
+    YYYYMMDD from a daily early-voting file like 2024-10-17.csv, so a series
+    of days compares like a series of years.
+    """
+    name = os.path.basename(file_path)
+    match = re.search(r"(\d{4})-(\d{2})-(\d{2})", name)
+    if match:
+        return int("".join(match.groups()))
+    match = re.search(r"(\d{4})", name)
+    return int(match.group(1)) if match else None
+
+
+def precinct_column(df):
+    """Return the name of the precinct key column of a turnout dataframe."""
+    for col in PRECINCT_COLUMNS:
+        if col in df.columns:
+            return col
+    return df.columns[0]
+
+
+def build_comparison(file_paths, progress=None):
+    """
+    Load several turnout files and join them on precinct.
+
+    Every column except the precinct key is prefixed with its year, e.g.
+    '2020:gender_F_turnout', so the per-year turnout/base/voted triplets keep
+    the naming that add_summary_row and add_tooltips rely on. Raises
+    ValueError when a file name has no year to order and prefix it by.
+    """
+    undated = [os.path.basename(p) for p in file_paths if year_from_filename(p) is None]
+    if undated:
+        raise ValueError(f"No year in file name: {', '.join(undated)}")
+
+    merged = None
+    years = []
+    for i, file_path in enumerate(sorted(file_paths, key=year_from_filename)):
+        year = year_from_filename(file_path)
+        df = load_turnout(file_path)
+        key = precinct_column(df)
+        df = df.rename(columns={key: "id"})
+        df = df.rename(columns={col: f"{year}:{col}" for col in df.columns if col != "id"})
+        merged = df if merged is None else merged.merge(df, on="id", how="outer")
+        years.append(year)
+        if progress:
+            progress(i + 1, len(file_paths))
+
+    # Precincts that did not exist in a given year have no counts for it
+    numeric_columns = [col for col in merged.columns if not col.endswith("_turnout") and col != "id"]
+    merged[numeric_columns] = merged[numeric_columns].fillna(0).astype(int)
+    merged = merged.fillna("")
+    return merged.sort_values("id", ignore_index=True), years
+
+
+def voted_column(base_col):
+    """The voted-count column of a base column; total's is voted_total rather than total_voted."""
+    return "voted_total" if base_col == "total" else f"{base_col}_voted"
+
+
+def add_delta_column(df, base_col, from_year, to_year):
+    """
+    Add a '<from>-<to>:<base>_turnout_delta' column holding the change in
+    turnout percentage points for base_col between two loaded years.
+    The summary row holds column totals, so its delta is the overall change.
+    """
+    def turnout(year):
+        voted = df[f"{year}:{voted_column(base_col)}"].astype(float)
+        total = df[f"{year}:{base_col}"].astype(float)
+        return voted / total
+
+    delta_col = f"{from_year}-{to_year}:{base_col}_turnout_delta"
+    delta = (turnout(to_year) - turnout(from_year)) * 100
+    df[delta_col] = delta.map(lambda x: f"{x:+.2f}" if pd.notnull(x) and abs(x) != float("inf") else "")
+    return delta_col
+
+
 def add_summary_row(df):
     """Add a summary row with sums and calculated turnout percentages."""
     summary = {}
@@ -59,16 +165,115 @@ def add_summary_row(df):
     return pd.concat([df, pd.DataFrame([summary])], ignore_index=True)
 
 
+def run_in_background(work, on_done):
+    """
+    Run work(progress) on a worker thread while the main loop stays responsive.
+
+    work receives a progress(done, total) callback that is safe to call from
+    the worker; on_done(result) is invoked on the Tk main thread.
+    """
+    messages = queue.Queue()
+
+    def progress(done, total):
+        messages.put(("progress", done, total))
+
+    def worker():
+        try:
+            messages.put(("done", work(progress)))
+        except Exception as exc:  # Surface parse errors in the status bar
+            messages.put(("error", exc))
+
+    def poll():
+        try:
+            while True:
+                message = messages.get_nowait()
+                if message[0] == "progress":
+                    progress_bar.stop()
+                    progress_bar.configure(mode="determinate", maximum=message[2], value=message[1])
+                    continue
+                progress_bar.stop()
+                progress_bar.configure(mode="determinate", value=0)
+                if message[0] == "done":
+                    status_var.set("")
+                    on_done(message[1])
+                else:
+                    status_var.set(f"Error: {message[1]}")
+                return
+        except queue.Empty:
+            root.after(50, poll)
+
+    status_var.set("Loading...")
+    progress_bar.configure(mode="indeterminate")
+    progress_bar.start(10)
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(50, poll)
+
+
 def open_file():
     """Open a CSV file and calculate turnout."""
     file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
     if not file_path:
         return
 
-    # Calculate turnout and update the table
-    df = calculate_turnout(file_path)
-    df_with_summary = add_summary_row(df)
-    update_table(df_with_summary)
+    def work(progress):
+        df = load_turnout(file_path)
+        return add_summary_row(df)
+
+    def done(df_with_summary):
+        global comparison_mode, comparison_years
+        comparison_mode = False
+        comparison_years = []
+        root.title(f"Turnout Summary - {os.path.basename(file_path)}")
+        update_table(df_with_summary)
+
+    # Calculate turnout off the main thread and update the table
+    run_in_background(work, done)
+
+
+def compare_files():
+    """Open several turnout CSVs (one per year) and show them side by side."""
+    file_paths = filedialog.askopenfilenames(filetypes=[("CSV files", "*.csv")])
+    if not file_paths:
+        return
+
+    def work(progress):
+        merged, years = build_comparison(file_paths, progress)
+        return add_summary_row(merged), years
+
+    def done(result):
+        global comparison_mode, comparison_years
+        df_with_summary, comparison_years = result
+        comparison_mode = True
+        root.title(f"Turnout Summary - {', '.join(str(y) for y in comparison_years)}")
+        update_table(df_with_summary)
+
+    run_in_background(work, done)
+
+
+def add_delta():
+    """Ask for a base column and two years, then add a turnout delta column."""
+    if not comparison_mode or len(comparison_years) < 2:
+        status_var.set("Open at least two years with Compare Years first")
+        return
+
+    base_col = simpledialog.askstring("Year-over-Year Delta", "Base column (e.g. voted_total, race_B):", parent=root)
+    if not base_col:
+        return
+    if base_col == "voted_total":
+        base_col = "total"  # voted_total is the "_voted" companion of total
+    from_year = simpledialog.askinteger("Year-over-Year Delta", "From year:", initialvalue=comparison_years[0], parent=root)
+    to_year = simpledialog.askinteger("Year-over-Year Delta", "To year:", initialvalue=comparison_years[-1], parent=root)
+    if from_year not in comparison_years or to_year not in comparison_years:
+        status_var.set("Both years must be loaded")
+        return
+    if f"{from_year}:{voted_column(base_col)}" not in current_df.columns:
+        status_var.set(f"No turnout data for {base_col}")
+        return
+
+    delta_col = add_delta_column(current_df, base_col, from_year, to_year)
+    column_visibility.setdefault(delta_col, tk.BooleanVar()).set(True)
+    sort_state.setdefault(delta_col, False)
+    update_table(current_df)
 
 
 def update_table(df):
@@ -76,14 +281,14 @@ def update_table(df):
     global current_df, column_visibility, sort_state
     current_df = df
 
-    # Initialize column visibility if not already set
-    if not column_visibility:
-        for col in current_df.columns:
-            column_visibility[col] = tk.BooleanVar(value=(col == "precinct_abbrv"))  # Default: Only "precinct_abbrv"
+    # Initialize column visibility for any columns not seen yet
+    for col in current_df.columns:
+        if col not in column_visibility:
+            column_visibility[col] = tk.BooleanVar(value=(col in PRECINCT_COLUMNS))  # Default: Only the precinct column
 
-    # Initialize sort state if not already set
-    if not sort_state:
-        for col in current_df.columns:
+    # Initialize sort state for any columns not seen yet
+    for col in current_df.columns:
+        if col not in sort_state:
             sort_state[col] = False  # Default: Not sorted (ascending)
 
     # Get visible columns
@@ -225,6 +430,8 @@ root.config(menu=menu)
 file_menu = tk.Menu(menu, tearoff=0)
 menu.add_cascade(label="File", menu=file_menu)
 file_menu.add_command(label="Open", command=open_file)
+file_menu.add_command(label="Compare Years", command=compare_files)
+file_menu.add_command(label="Add Year-over-Year Delta", command=add_delta)
 file_menu.add_command(label="Save As", command=save_file)
 file_menu.add_command(label="Select Columns", command=toggle_columns)
 file_menu.add_command(label="Exit", command=root.quit)
@@ -243,10 +450,20 @@ scroll_x = ttk.Scrollbar(root, orient=tk.HORIZONTAL, command=table.xview)
 scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
 table.configure(yscroll=scroll_y.set, xscroll=scroll_x.set)
 
+# Status bar with a progress indicator for background loads
+status_frame = ttk.Frame(root)
+status_frame.pack(fill=tk.X, side=tk.BOTTOM)
+status_var = tk.StringVar()
+ttk.Label(status_frame, textvariable=status_var).pack(side=tk.LEFT, padx=5)
+progress_bar = ttk.Progressbar(status_frame, length=200)
+progress_bar.pack(side=tk.RIGHT, padx=5, pady=2)
+
 # Initialize global dataframe, column visibility, and sort state
 current_df = None
 column_visibility = {}
 sort_state = {}
+comparison_mode = False
+comparison_years = []
 
 # Tooltip management
 tooltip = Tooltip(table)
@@ -0,0 +1,166 @@
+import os
+import re
+import csv
+import glob
+import json
+import sqlite3
+import argparse
+
+DEFAULT_DATABASE = "wakeresults.db"
+
+SCHEMA = """
+CREATE TABLE contests (
+    contest_id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    csv_file TEXT NOT NULL,
+    kind TEXT NOT NULL,          -- 'results' or 'turnout'
+    tags TEXT NOT NULL,          -- JSON list
+    pick INTEGER
+);
+CREATE TABLE candidates (
+    contest_id INTEGER NOT NULL REFERENCES contests(contest_id),
+    name TEXT NOT NULL,
+    political_party TEXT,
+    column_name TEXT NOT NULL,   -- CSV column holding this candidate's votes
+    total_column TEXT NOT NULL,  -- CSV column (or 'all') used as the denominator
+    votes INTEGER,
+    total_votes INTEGER,
+    percent REAL
+);
+CREATE TABLE results (
+    year INTEGER NOT NULL,
+    contest_id INTEGER NOT NULL REFERENCES contests(contest_id),
+    precinct TEXT NOT NULL,
+    candidate TEXT NOT NULL,
+    votes INTEGER NOT NULL
+);
+CREATE TABLE turnout (
+    year INTEGER NOT NULL,
+    precinct TEXT NOT NULL,
+    metric TEXT NOT NULL,        -- demoturnout column, e.g. 'party_DEM_voted'
+    count INTEGER NOT NULL
+);
+"""
+
+# Covering indexes: each one holds every column the matching lookups read
+INDEXES = """
+CREATE INDEX results_by_contest ON results (year, contest_id, precinct, candidate, votes);
+CREATE INDEX results_by_precinct ON results (precinct, year, contest_id, candidate, votes);
+CREATE INDEX results_by_candidate ON results (candidate, year, contest_id, precinct, votes);
+CREATE INDEX turnout_by_year ON turnout (year, precinct, metric, count);
+CREATE INDEX turnout_by_precinct ON turnout (precinct, year, metric, count);
+CREATE INDEX contests_by_year ON contests (year, name);
+CREATE INDEX candidates_by_contest ON candidates (contest_id, name);
+CREATE INDEX candidates_by_name ON candidates (name, contest_id);
+"""
+
+
+def read_counts(csv_path):
+    """Yield (precinct, column, count) for every non-id cell of a CSV."""
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader)[1:]
+        for row in reader:
+            precinct = row[0]
+            for column, value in zip(columns, row[1:]):
+                yield precinct, column, int(float(value))
+
+
+def summary_files(json_dir):
+    """Year JSONs (results) and turnout summary JSONs found in json_dir."""
+    files = []
+    for path in sorted(glob.glob(os.path.join(json_dir, "*.json"))):
+        name = os.path.basename(path)
+        if re.fullmatch(r"\d{4}\.json", name):
+            files.append((path, "results"))
+        elif re.fullmatch(r"\d{4}d\.json", name) or name == "maps.json":
+            files.append((path, "turnout"))
+    return files
+
+
+def build_warehouse(database, json_dir="..", data_dir="."):
+    """
+    Bulk-load every year's contests, precinct vote counts and demoturnout rows
+    into a fresh SQLite database.
+
+    Everything is inserted with executemany inside a single transaction and
+    the indexes are created after the load; the finished file replaces
+    database atomically.
+    """
+    tmp_database = f"{database}.tmp"
+    if os.path.exists(tmp_database):
+        os.remove(tmp_database)
+
+    conn = sqlite3.connect(tmp_database)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(SCHEMA)
+
+    turnout_years = set()
+    with conn:
+        for json_file, kind in summary_files(json_dir):
+            with open(json_file, "r", encoding="utf-8") as f:
+                contests = json.load(f)["contests"]
+
+            for contest in contests:
+                csv_path = os.path.join(data_dir, contest["csv_file"])
+                if not os.path.isfile(csv_path):
+                    print(f"Skipping {contest['name']} ({contest['year']}): {contest['csv_file']} not found")
+                    continue
+                year = int(contest["year"])
+
+                cursor = conn.execute(
+                    "INSERT INTO contests (year, name, csv_file, kind, tags, pick) VALUES (?, ?, ?, ?, ?, ?)",
+                    (year, contest["name"], contest["csv_file"], kind, json.dumps(contest.get("tags", [])), contest.get("pick")),
+                )
+                contest_id = cursor.lastrowid
+
+                conn.executemany(
+                    "INSERT INTO candidates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (contest_id, c["name"], c.get("political_party") or c.get("party"),
+                         c.get("column", c["name"]), c.get("total", "all"),
+                         c.get("votes"), c.get("total_votes"), c.get("percent"))
+                        for c in contest.get("candidates", [])
+                    ],
+                )
+
+                # Turnout summaries all point at the year's one demoturnout CSV
+                if kind == "turnout":
+                    if year not in turnout_years:
+                        turnout_years.add(year)
+                        conn.executemany(
+                            "INSERT INTO turnout VALUES (?, ?, ?, ?)",
+                            ((year, precinct, metric, count) for precinct, metric, count in read_counts(csv_path)),
+                        )
+                    continue
+
+                conn.executemany(
+                    "INSERT INTO results VALUES (?, ?, ?, ?, ?)",
+                    ((year, contest_id, precinct, candidate, votes)
+                     for precinct, candidate, votes in read_counts(csv_path) if votes),
+                )
+
+        conn.executescript(INDEXES)
+
+    conn.execute("ANALYZE")
+    conn.close()
+    os.replace(tmp_database, database)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an indexed SQLite warehouse of every election's results and turnout.")
+    parser.add_argument("database", nargs="?", default=DEFAULT_DATABASE, help=f"Output database (default: {DEFAULT_DATABASE})")
+    parser.add_argument("--json-dir", default="..", help="Directory containing the year and turnout JSON files (default: ..)")
+    parser.add_argument("--data-dir", default=".", help="Directory containing the CSVs (default: .)")
+    args = parser.parse_args()
+
+    build_warehouse(args.database, args.json_dir, args.data_dir)
+    with sqlite3.connect(args.database) as conn:
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("contests", "candidates", "results", "turnout")}
+    print(f"Warehouse written to {args.database}: " + ", ".join(f"{n} {table}" for table, n in counts.items()))
+
+if __name__ == "__main__":
+    main()
@@ -132,8 +132,18 @@ document.addEventListener("DOMContentLoaded", () => {
     "2024.json"
   ];
 
+  // Hashed file names written by data/publish.py (absent when serving the repo directly)
+  let assetManifest = {};
+  const assetName = file => assetManifest[file] || file;
+
   // Fetch and parse all JSON files
-  Promise.all(jsonFiles.map(file => fetch(file).then(response => response.json())))
+  fetch("manifest.json")
+    .then(response => response.ok ? response.json() : {})
+    .catch(() => ({}))
+    .then(manifest => {
+      assetManifest = manifest;
+      return Promise.all(jsonFiles.map(file => fetch(assetName(file)).then(response => response.json())));
+    })
     .then(allData => {
       // Extract "contests" from each JSON file and merge into a single array
       electionObjects = allData.flatMap(data => data.contests);
@@ -365,7 +375,7 @@ document.addEventListener("DOMContentLoaded", () => {
   
   // Construct URL for Simple Mode
   function constructURL(selectedElection) {
-    const file = "2024.geojson";
+    const file = assetName("2024.geojson");
     const csv = selectedElection.candidates.map(candidate => candidate.csv || selectedElection.csv_file).join(",");
     const portion = selectedElection.candidates.map(candidate => candidate.column || candidate.name).join(",");
     const total = selectedElection.candidates.map(candidate => candidate.total).join(",");
@@ -414,7 +424,7 @@ document.addEventListener("DOMContentLoaded", () => {
       if (selectedCandidates.length < 2) return;
 
       // Construct URL parameters using the structured selectedCandidates data
-      const file = "2024.geojson";
+      const file = assetName("2024.geojson");
       const csv = selectedCandidates.map(candidate => candidate.csv).join(",");
       const portion = selectedCandidates.map(candidate => candidate.column).join(",");
       const total = selectedCandidates.map(candidate => candidate.total).join(",");
@@ -213,8 +213,9 @@ export function onEachFeature(feature, layer, precinctData, portionColumns, tota
 
   layer.bindTooltip(tooltipContent, { sticky: true });
 
-  // Create label marker for the precinct
-  const center = layer.getBounds().getCenter();
+  // Create label marker for the precinct (precomputed by data/geometry.py when available)
+  const label = feature.properties.label;
+  const center = label ? L.latLng(label[0], label[1]) : layer.getBounds().getCenter();
   const labelMarker = L.marker(center, {
     icon: L.divIcon({
       className: 'label',
@@ -236,6 +237,11 @@ export function onEachFeature(feature, layer, precinctData, portionColumns, tota
 function getFeatureCenter(feature) {
   const { type, coordinates } = feature.geometry;
 
+  if (feature.properties && feature.properties.label) {
+    // Label point precomputed by data/geometry.py
+    return L.latLng(feature.properties.label[0], feature.properties.label[1]);
+  }
+
   if (type === 'Point') {
     // For Point, the center is the coordinate itself
     return L.latLng(coordinates[1], coordinates[0]); // [longitude, latitude]
@@ -250,10 +256,9 @@ function getFeatureCenter(feature) {
   if (type === 'MultiPolygon') {
     // For MultiPolygon, calculate the centroid of the largest polygon
     const polygons = coordinates.map(polygon => polygon[0].map(coord => L.latLng(coord[1], coord[0])));
-    const largestPolygon = polygons.reduce((largest, current) => {
-      return calculateArea(current) > calculateArea(largest) ? current : largest;
-    }, polygons[0]);
-    return calculateCentroid(largestPolygon);
+    const areas = polygons.map(calculateArea);
+    const largestIndex = areas.reduce((largest, area, index) => area > areas[largest] ? index : largest, 0);
+    return calculateCentroid(polygons[largestIndex]);
   }
 
   throw new Error(`Unsupported geometry type: ${type}`);
@@ -0,0 +1,245 @@
+import os
+import sys
+import glob
+import json
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Repository root; every stage path below is relative to it
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Optional per-year settings, e.g.
+# {"turnout": {"2024": {"voter_file": "...", "voting_file": "...", "election": "11/05/2024"}},
+#  "summary": {"2024": {"template": "maps.json", "output": "maps.json"}}}
+CONFIG_FILE = "pipeline.json"
+
+# Stage signatures from the last successful run
+STATE_FILE = ".pipeline-state.json"
+
+# Stages run the package from this tree, whether or not it is installed
+WAKERESULTS = [sys.executable, "-m", "wakeresults"]
+
+# Outputs are built here and swapped into the tree once every stage succeeded
+STAGING_DIR = ".pipeline-staging"
+
+
+class Stage:
+    """
+    One build step: a command run in a scratch directory, the files it reads
+    and the files it produces (relative to the repo root).
+
+    collect(scratch_dir) returns {repo path: file in scratch_dir} for the
+    outputs, so stages whose output names are only known after running (the
+    per-contest CSVs) can still be staged.
+    """
+
+    def __init__(self, name, inputs, outputs, command, collect):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.command = command
+        self.collect = collect
+
+
+def results_stage(year):
+    """`wakeresults results` for one year, copying its CSVs to data/ and JSON to the root."""
+    raw_file = f"rawdata/{year}.txt"
+
+    def command(locate):
+        return WAKERESULTS + ["results", locate(raw_file)]
+
+    def collect(scratch):
+        staged = {f"{year}.json": os.path.join(scratch, f"{year}.json")}
+        for path in glob.glob(os.path.join(scratch, f"{year}_*.csv")):
+            staged[f"data/{os.path.basename(path)}"] = path
+        return staged
+
+    return Stage(f"results:{year}", [raw_file, "rawdata/winner.count", "wakeresults/results.py", "wakeresults/contests.py"],
+                 [f"{year}.json"], command, collect)
+
+
+def turnout_stage(year, settings):
+    """`wakeresults turnout` for one year, published as data/demoturnout<year>.csv."""
+    output = f"data/demoturnout{year}.csv"
+    # Staged under its published name; summarize takes the year from the file name
+    scratch_name = os.path.basename(output)
+
+    def command(locate):
+        return WAKERESULTS + ["turnout", locate(settings["voter_file"]), locate(settings["voting_file"]), scratch_name,
+                              "--election", settings["election"]]
+
+    def collect(scratch):
+        # The published turnout files key precincts by "id", like the contest CSVs
+        path = os.path.join(scratch, scratch_name)
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        lines[0] = lines[0].replace("precinct_abbrv", "id", 1)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.writelines(lines)
+        return {output: path}
+
+    return Stage(f"turnout:{year}", [settings["voter_file"], settings["voting_file"], "wakeresults/turnout.py"],
+                 [output], command, collect)
+
+
+def summary_stage(year, settings):
+    """`wakeresults summarize` for one year, refreshing the <year>d.json turnout summary."""
+    turnout_csv = f"data/demoturnout{year}.csv"
+    output = settings.get("output", f"{year}d.json")
+    template = settings.get("template", output)
+
+    def command(locate):
+        return WAKERESULTS + ["summarize", locate(turnout_csv), locate(template), "summary.json"]
+
+    def collect(scratch):
+        return {output: os.path.join(scratch, "summary.json")}
+
+    inputs = [turnout_csv, "wakeresults/summarize.py"] + ([template] if template != output else [])
+    return Stage(f"summary:{year}", inputs, [output], command, collect)
+
+
+def build_stages(config):
+    """Declare every stage the tree can build."""
+    stages = []
+    for raw_file in sorted(glob.glob(os.path.join(ROOT, "rawdata", "*.txt"))):
+        stages.append(results_stage(os.path.splitext(os.path.basename(raw_file))[0]))
+    for year, settings in sorted(config.get("turnout", {}).items()):
+        stages.append(turnout_stage(year, settings))
+    # Turnout summaries for every configured year and every existing <year>d.json
+    summary_years = set(config.get("summary", {}))
+    summary_years |= {os.path.basename(p)[:4] for p in glob.glob(os.path.join(ROOT, "[0-9][0-9][0-9][0-9]d.json"))}
+    for year in sorted(summary_years):
+        stages.append(summary_stage(year, config.get("summary", {}).get(year, {})))
+    return stages
+
+
+def signature(path):
+    """(size, mtime) of an input; large voter files are never re-read just to hash them."""
+    full = os.path.join(ROOT, path)
+    if not os.path.exists(full):
+        return None
+    stat = os.stat(full)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def dependencies(stages):
+    """Map each stage name to the stages producing one of its inputs."""
+    producers = {output: stage.name for stage in stages for output in stage.outputs}
+    return {stage.name: {producers[i] for i in stage.inputs if i in producers and producers[i] != stage.name}
+            for stage in stages}
+
+
+def run(stages, state, jobs, force=False, dry_run=False):
+    """
+    Run stages in dependency order, independent stages in parallel.
+
+    A stage is skipped when its input signatures match the last successful
+    run and none of its upstream stages ran. Returns (staged files, stages run).
+    """
+    deps = dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    staged = {}  # repo path -> staged file
+    ran, done = set(), set()
+    staging = os.path.join(ROOT, STAGING_DIR)
+
+    def locate(path):
+        """Inputs produced earlier in this run are read from staging."""
+        return staged.get(path, os.path.join(ROOT, path))
+
+    def needs_run(stage):
+        current = {i: signature(i) for i in stage.inputs}
+        outputs_exist = all(os.path.exists(os.path.join(ROOT, o)) for o in stage.outputs)
+        return force or deps[stage.name] & ran or not outputs_exist or state.get(stage.name) != current
+
+    def execute(stage):
+        scratch = os.path.join(staging, stage.name.replace(":", "_"))
+        shutil.rmtree(scratch, ignore_errors=True)
+        os.makedirs(scratch)
+        # test.py reads winner.count from its working directory
+        shutil.copy(locate("rawdata/winner.count"), scratch)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+        subprocess.run(stage.command(locate), cwd=scratch, env=env, check=True, stdout=subprocess.DEVNULL)
+        return stage.collect(scratch)
+
+    pending = [stage.name for stage in stages]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while pending or running:
+            for name in [n for n in pending if deps[n] <= done]:
+                pending.remove(name)
+                stage = by_name[name]
+                if not needs_run(stage):
+                    print(f"  skip   {name}")
+                    done.add(name)
+                    continue
+                print(f"  run    {name}")
+                ran.add(name)
+                if dry_run:
+                    done.add(name)
+                    continue
+                running[pool.submit(execute, stage)] = stage
+            if not running:
+                if pending and not [n for n in pending if deps[n] <= done]:
+                    raise RuntimeError(f"Dependency cycle between: {', '.join(pending)}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                staged.update(future.result())  # Re-raises a failed stage
+                done.add(stage.name)
+
+    return staged, ran
+
+
+def swap_in(staged):
+    """Move every staged output into the tree; each file lands with an atomic rename."""
+    for path, staged_file in staged.items():
+        target = os.path.join(ROOT, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(staged_file, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build every release output, skipping stages whose inputs are unchanged.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Stages to run in parallel (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Run every stage even if its inputs are unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="Only print which stages would run")
+    parser.add_argument("--publish", action="store_true", help="Run data/publish.py after the outputs are swapped in")
+    args = parser.parse_args()
+
+    config = {}
+    if os.path.exists(os.path.join(ROOT, CONFIG_FILE)):
+        with open(os.path.join(ROOT, CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+    state = {}
+    if os.path.exists(os.path.join(ROOT, STATE_FILE)):
+        with open(os.path.join(ROOT, STATE_FILE), "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+    stages = build_stages(config)
+    staged, ran = run(stages, state, args.jobs, args.force, args.dry_run)
+    if args.dry_run:
+        return
+
+    # Nothing is touched in the tree until every stage has succeeded
+    swap_in(staged)
+    shutil.rmtree(os.path.join(ROOT, STAGING_DIR), ignore_errors=True)
+
+    # Signatures are taken after the swap so swapped-in inputs count as current
+    new_state = dict(state)
+    for stage in stages:
+        if stage.name in ran:
+            new_state[stage.name] = {i: signature(i) for i in stage.inputs}
+    with open(os.path.join(ROOT, STATE_FILE), "w", encoding="utf-8") as f:
+        json.dump(new_state, f, indent=2)
+    print(f"Updated {len(staged)} files")
+
+    if args.publish:
+        subprocess.run([sys.executable, "publish.py"], cwd=os.path.join(ROOT, "data"), check=True)
+
+if __name__ == "__main__":
+    main()
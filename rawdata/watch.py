@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from wakeresults.contests import parse_winner_count, parse_year_from_election_dt, is_ignored_contest
+from wakeresults.results import load_results, build_contest, format_csv
+
+# Result files the SBE publishes (zip archives hold a single .txt)
+WATCHED_EXTENSIONS = (".txt", ".zip")
+
+# Raw columns whose changes affect a contest's outputs
+FINGERPRINT_COLUMNS = ["precinct_code", "candidate_name", "candidate_party_lbl", "voting_method_lbl", "vote_ct"]
+
+
+class WatchState:
+    """Aggregate state carried between refreshes."""
+
+    def __init__(self):
+        self.precinct_hashes = None  # (contest_title, precinct_code) -> row hash
+        self.contests = {}  # contest_title -> contest_info
+        self.order = []  # contest titles in file order
+        self.name = None  # output prefix, e.g. "2024"
+
+
+def precinct_hashes(df):
+    """
+    Hash every raw row and sum the hashes per (contest, precinct).
+
+    The sum is order independent, so a precinct only shows up as changed when
+    one of its rows was added, removed or edited.
+    """
+    row_hashes = pd.util.hash_pandas_object(df[FINGERPRINT_COLUMNS], index=False)
+    return row_hashes.groupby([df["contest_title"], df["precinct_code"]], sort=False).sum()
+
+
+def changed_contests(old, new):
+    """Return the contest titles whose per-precinct hashes differ."""
+    if old is None:
+        return set(new.index.get_level_values(0)), len(new)
+    common = new.index.intersection(old.index)
+    edited = common[new.loc[common].to_numpy() != old.loc[common].to_numpy()]
+    keys = edited.append(new.index.symmetric_difference(old.index))
+    return set(keys.get_level_values(0)), len(keys)
+
+
+def atomic_write(path, write):
+    """Write a file via a temporary sibling and rename it into place."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            write(f)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def publish(outputs, out_dir):
+    """Atomically publish a contest's CSV outputs into out_dir."""
+    for output_csv_name, frame in outputs.items():
+        atomic_write(os.path.join(out_dir, output_csv_name), lambda f, frame=frame: f.write(format_csv(frame)))
+
+
+def publish_json(state, out_dir):
+    """Atomically rewrite the year JSON from the cached contest entries."""
+    contests_info = [state.contests[title] for title in state.order]
+    atomic_write(
+        os.path.join(out_dir, f"{state.name}.json"),
+        lambda f: json.dump({"contests": contests_info}, f, indent=2, ensure_ascii=False),
+    )
+
+
+def refresh(filepath, state, out_dir, winners_dict, methods=False, metrics=False):
+    """
+    Process a new results file, rebuilding only the contests that changed.
+    Returns (number of contests rebuilt, number of precinct rows changed).
+    The precinct hashes are only replaced once every output is published, so
+    a failed refresh is retried in full.
+    """
+    df = load_results(filepath)
+    df = df[~df["contest_title"].map(is_ignored_contest)]
+
+    if state.name is None:
+        state.name = str(parse_year_from_election_dt(df["election_dt"]))
+
+    # 1. Diff the per-precinct hashes against the previous file
+    hashes = precinct_hashes(df)
+    changed, changed_precincts = changed_contests(state.precinct_hashes, hashes)
+    order = list(df["contest_title"].unique())
+
+    # 2. Rebuild and publish only the contests whose precinct rows changed
+    for contest_title, sub_df in df[df["contest_title"].isin(changed)].groupby("contest_title", sort=False):
+        contest_info, outputs = build_contest(contest_title, sub_df, state.name, winners_dict, methods, metrics)
+        publish(outputs, out_dir)
+        state.contests[contest_title] = contest_info
+
+    # Contests that vanished from the file drop out of the JSON
+    for contest_title in set(state.contests) - set(order):
+        del state.contests[contest_title]
+
+    state.order = order
+    if changed:
+        publish_json(state, out_dir)
+    state.precinct_hashes = hashes
+    return len(changed & set(order)), changed_precincts
+
+
+def newest_ready_file(drop_dir, sizes):
+    """
+    Return the newest results file in drop_dir whose size did not change since
+    the previous poll, so half-copied files are never read.
+    """
+    candidates = []
+    for entry in os.scandir(drop_dir):
+        if entry.is_file() and entry.name.lower().endswith(WATCHED_EXTENSIONS):
+            stat = entry.stat()
+            stable = sizes.get(entry.path) == stat.st_size
+            sizes[entry.path] = stat.st_size
+            if stable:
+                candidates.append((stat.st_mtime, entry.path))
+    return max(candidates)[1] if candidates else None
+
+
+def watch(drop_dir, out_dir, winners_file, interval, name=None, methods=False, metrics=False):
+    """Poll drop_dir and refresh the outputs whenever a new file lands."""
+    winners_dict = parse_winner_count(winners_file)
+    state = WatchState()
+    state.name = name
+    sizes = {}
+    last_seen = None
+
+    print(f"Watching {drop_dir} (every {interval}s), publishing to {out_dir}")
+    while True:
+        # A half-written zip, a parse error or a transient I/O error is logged and the file retried next poll
+        try:
+            filepath = newest_ready_file(drop_dir, sizes)
+            if filepath:
+                seen = (filepath, os.path.getmtime(filepath))
+                if seen != last_seen:
+                    start = time.perf_counter()
+                    rebuilt, changed_precincts = refresh(filepath, state, out_dir, winners_dict, methods, metrics)
+                    last_seen = seen
+                    elapsed = (time.perf_counter() - start) * 1000
+                    print(f"{os.path.basename(filepath)}: {changed_precincts} precinct rows changed, "
+                          f"{rebuilt} contests rebuilt in {elapsed:.0f} ms")
+        except Exception as exc:
+            print(f"Refresh failed, retrying next poll: {exc!r}", file=sys.stderr)
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a drop directory for SBE results files and publish delta updates.")
+    parser.add_argument("drop_dir", help="Directory the results files are dropped into")
+    parser.add_argument("--out-dir", default=".", help="Directory to publish the CSVs and year JSON to (default: .)")
+    parser.add_argument("--winners", default="winner.count", help="Path to the winner.count file (default: winner.count)")
+    parser.add_argument("--name", help="Output prefix (default: the election year)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Polling interval in seconds (default: 2)")
+    parser.add_argument("--methods", action="store_true", help="Also publish the voting-method breakdown CSVs")
+    parser.add_argument("--metrics", action="store_true", help="Also publish the per-precinct metrics CSVs")
+    args = parser.parse_args()
+
+    try:
+        watch(args.drop_dir, args.out_dir, args.winners, args.interval, args.name, args.methods, args.metrics)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
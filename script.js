@@ -1,6 +1,13 @@
 import { loadGeoJson, styleFeature, onEachFeature } from './maputils.js';
 import { initColors, getColorScaleForColumn } from './colorScale.js';
 
+// Hashed file names written by data/publish.py (absent when serving the repo directly);
+// shared links keep the stable names and are resolved through it
+const assetManifest = await fetch("manifest.json")
+  .then(response => response.ok ? response.json() : {})
+  .catch(() => ({}));
+const assetName = file => assetManifest[file] || file;
+
 export let precinctData = {};
 export let isAbsoluteMode = false;
 
@@ -66,7 +73,7 @@ async function calculatePrecinctData(csvFiles, portionColumns, totalColumns) {
 
   // Process each unique file only once
   for (const csvFile of uniqueCsvFiles) {
-    const csvFileUrl = `data/${csvFile}`;
+    const csvFileUrl = assetName(`data/${csvFile}`);
     const response = await fetch(csvFileUrl);
     if (!response.ok) {
       throw new Error(`Failed to load CSV file: ${csvFile}: ${response.statusText}`);
@@ -221,7 +228,7 @@ if (portionColumns.length !== csvFileNames.length) {
   throw new Error('Mismatched portion and total columns.');
 }
 
-const geoJsonFileUrl = `shapes/${geoJsonFileName}`;
+const geoJsonFileUrl = assetName(`shapes/${geoJsonFileName}`);
 
 export let enabledColumns = {};
 
@@ -0,0 +1,3 @@
+"""Wake County election results: SBE results processing, turnout summaries and checks."""
+
+__version__ = "0.1.0"
@@ -0,0 +1,32 @@
+"""
+Input hashes for derived outputs (crosswalks, inference estimates,
+similarity indexes): a cached output is current while the sha256 of the
+files it was built from is unchanged.
+"""
+import os
+import json
+import hashlib
+
+
+def year_inputs(year, json_dir=".", data_dir="data"):
+    """<year>.json, every contest CSV it lists and the year's demoturnout CSV when present."""
+    json_file = os.path.join(json_dir, f"{year}.json")
+    with open(json_file, "r", encoding="utf-8") as f:
+        csv_files = [contest["csv_file"] for contest in json.load(f)["contests"]]
+    turnout_file = f"demoturnout{year}.csv"
+    if os.path.exists(os.path.join(data_dir, turnout_file)):
+        csv_files.append(turnout_file)
+    return [json_file] + [os.path.join(data_dir, f) for f in dict.fromkeys(csv_files)]
+
+
+def inputs_hash(paths, version=None):
+    """
+    sha256 over the bytes of every file in paths, in order. version is mixed
+    in so a tool can invalidate its caches when its output changes for the
+    same inputs.
+    """
+    digest = hashlib.sha256(f"version {version}\n".encode() if version is not None else b"")
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
@@ -0,0 +1,143 @@
+"""
+The `wakeresults` command.
+
+Only argparse is imported at startup; each subcommand imports its module
+(and pandas/numpy, where needed) when it runs.
+"""
+import sys
+import argparse
+
+
+def results_command(args):
+    from .results import run
+
+    run(args.files, args.winners, args.out_dir, args.methods, args.metrics, args.writers)
+
+
+def turnout_command(args):
+    from .turnout import process_voter_file
+
+    process_voter_file(args.voter_file, args.voting_file, args.output_file, args.election, args.county or None)
+
+
+def snapshot_diff_command(args):
+    from .snapshots import write_diff
+
+    write_diff(args.before_file, args.after_file, args.output_file, args.county or None)
+
+
+def earlyvote_command(args):
+    from .earlyvote import run
+
+    run(args.absentee_files, args.state, args.out_dir, args.voter_file, args.county or None, args.county_desc)
+
+
+def baseline_command(args):
+    from .projection import run_baseline
+
+    run_baseline(args.years, args.output, args.json_dir, args.data_dir)
+
+
+def project_command(args):
+    from .projection import run_projection
+
+    run_projection(args.results_file, args.baseline, args.output, args.winners, args.draws, args.seed)
+
+
+def summarize_command(args):
+    from .summarize import update_json
+
+    update_json(args.csv_file, args.json_file, args.output_file)
+    print(f"Updated JSON file written to {args.output_file}")
+
+
+def validate_command(args):
+    from .validate import validate, report
+
+    return 1 if report(validate(args.json_dir, args.data_dir, args.workers)) else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="wakeresults", description="Build and check the Wake County election results data.")
+    commands = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    results = commands.add_parser("results", help="Build per-contest precinct CSVs and the year JSON from SBE results files",
+                                  description="Build per-contest precinct CSVs and the year JSON from SBE results files.")
+    results.add_argument("files", nargs="*", help="Results files to process (default: every .txt in the current directory)")
+    results.add_argument("--winners", default="winner.count", help="Path to the winner.count file (default: winner.count)")
+    results.add_argument("--methods", action="store_true",
+                         help="Also write a <contest>_methods.csv voting-method breakdown next to each contest CSV")
+    results.add_argument("--metrics", action="store_true",
+                         help="Also write a <contest>_metrics.csv with shares, margins and winners, and add color breakpoints to the JSON")
+    results.add_argument("--out-dir", default=".", help="Directory to write the CSVs and year JSON into (default: .)")
+    results.add_argument("--writers", type=int, default=4, help="Threads writing output files (default: 4)")
+    results.set_defaults(handler=results_command)
+
+    turnout = commands.add_parser("turnout", help="Summarize a voter file into precinct demographic turnout",
+                                  description="Process a voter file and generate a precinct summary with voting data.")
+    turnout.add_argument("voter_file", help="Path to the input TSV voter file (UTF-8 or UTF-16)")
+    turnout.add_argument("voting_file", help="Path to the input TSV voting file")
+    turnout.add_argument("output_file", help="Path to the output CSV summary file")
+    turnout.add_argument("--election", default="11/05/2024", help="Election label to filter voting data (default: 11/05/2024)")
+    turnout.add_argument("--county", default="92", help="county_id to keep; empty keeps every county (default: 92, Wake)")
+    turnout.set_defaults(handler=turnout_command)
+
+    snapshot_diff = commands.add_parser("snapshot-diff", help="Count new, removed, moved and party-switched voters per precinct",
+                                        description="Compare two voter registration snapshots and write per-precinct deltas.")
+    snapshot_diff.add_argument("before_file", help="Path to the older TSV voter file")
+    snapshot_diff.add_argument("after_file", help="Path to the newer TSV voter file")
+    snapshot_diff.add_argument("output_file", help="Path to the output CSV")
+    snapshot_diff.add_argument("--county", default="92", help="county_id to keep; empty keeps every county (default: 92, Wake)")
+    snapshot_diff.set_defaults(handler=snapshot_diff_command)
+
+    earlyvote = commands.add_parser("earlyvote", help="Cumulative early-voting turnout per day, precinct and group",
+                                    description="Add absentee/one-stop files to the early-voting series and write cumulative turnout per day.")
+    earlyvote.add_argument("absentee_files", nargs="+", help="Absentee files (cumulative or single-day) to add")
+    earlyvote.add_argument("--voter-file", help="TSV voter file; (re)creates the state, discarding counted ballots")
+    earlyvote.add_argument("--state", default="earlyvote.npz", help="Saved day x precinct x group counts (default: earlyvote.npz)")
+    earlyvote.add_argument("--out-dir", default="earlyvote", help="Directory for the <day>.csv files and series.json (default: earlyvote)")
+    earlyvote.add_argument("--county", default="92", help="county_id to keep from the voter file; must match --county-desc (default: 92, Wake)")
+    earlyvote.add_argument("--county-desc", default="WAKE", help="county_desc to keep from the absentee file (default: WAKE)")
+    earlyvote.set_defaults(handler=earlyvote_command)
+
+    baseline = commands.add_parser("baseline", help="Precompute the precinct baseline used by project",
+                                   description="Build the precinct baseline matrices (historical share, registration, turnout) from earlier years.")
+    baseline.add_argument("years", nargs="+", type=int, help="Earlier years whose <year>.json and data CSVs form the baseline")
+    baseline.add_argument("--output", default="baseline.npz", help="Path to the output baseline file (default: baseline.npz)")
+    baseline.add_argument("--json-dir", default=".", help="Directory containing the year JSON files (default: .)")
+    baseline.add_argument("--data-dir", default="data", help="Directory containing the CSVs (default: data)")
+    baseline.set_defaults(handler=baseline_command)
+
+    project = commands.add_parser("project", help="Project every contest from partially reported results",
+                                  description="Project final results, win probabilities and share intervals from a partial SBE results file.")
+    project.add_argument("results_file", help="Partial SBE results file")
+    project.add_argument("--baseline", default="baseline.npz", help="Baseline built by the baseline command (default: baseline.npz)")
+    project.add_argument("--output", default="projection.json", help="Path to the output JSON (default: projection.json)")
+    project.add_argument("--winners", help="Path to a winner.count file for multi-seat contests")
+    project.add_argument("--draws", type=int, default=1000, help="Monte Carlo draws (default: 1000)")
+    project.add_argument("--seed", type=int, default=20241105, help="Random seed, fixed so refreshes are reproducible (default: 20241105)")
+    project.set_defaults(handler=project_command)
+
+    summarize = commands.add_parser("summarize", help="Update a turnout summary JSON from its demoturnout CSV",
+                                    description="Update JSON summary file based on CSV election results.")
+    summarize.add_argument("csv_file", help="Path to the input CSV file.")
+    summarize.add_argument("json_file", help="Path to the input JSON file.")
+    summarize.add_argument("output_file", help="Path to the output JSON file.")
+    summarize.set_defaults(handler=summarize_command)
+
+    validate = commands.add_parser("validate", help="Check that the published CSVs agree with the JSON files",
+                                   description="Check that the published CSVs agree with the year and turnout JSON files.")
+    validate.add_argument("--json-dir", default=".", help="Directory containing the JSON files (default: .)")
+    validate.add_argument("--data-dir", default="data", help="Directory containing the CSVs (default: data)")
+    validate.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    validate.set_defaults(handler=validate_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Contest naming and winner.count parsing.
+
+Kept free of pandas and numpy so lightweight commands and tools can use it
+without paying for those imports.
+"""
+import re
+from datetime import datetime
+
+# Pseudo-candidates load_results writes for over and under votes; they are not votes for anyone
+NON_CANDIDATES = ("over", "under")
+
+def parse_winner_count(file_path):
+    """
+    Parses the winner.count file and returns a dictionary of contests with their 'pick' values.
+    Format of the dictionary:
+    {
+        (year, contest_name): pick_value
+    }
+    """
+    winners_dict = {}
+    current_year = None
+
+    with open(file_path, "r") as f:
+        for line in f:
+            line = line.strip()
+
+            # If the line starts with "year XXXX", update the current year
+            if line.startswith("year "):
+                current_year = line.split(" ")[1]
+                continue
+
+            # Otherwise, parse the contest name and "vote for X"
+            match = re.match(r"^(.*) \(VOTE FOR (\d+)\)$", line)
+            if match:
+                contest_name = match.group(1)
+                pick_value = int(match.group(2))
+
+                # Store the contest name and pick value in the dictionary
+                if current_year is not None:
+                    winners_dict[(current_year, contest_name)] = pick_value
+
+    return winners_dict
+
+def get_tags(contest_title: str) -> list:
+    """
+    Determine tags (local, state, federal, bond) for a contest_title based on simple rules:
+      - If it starts with 'US' -> ['federal']
+      - Elif it starts with 'NC' -> ['state']
+      - Elif it starts with 'WAKE' -> ['local']
+      - Elif it contains 'CITY' or 'TOWN' (case-insensitive) -> ['local']
+      - Else -> ['state']
+      - If 'BOND' in the title (case-insensitive), also add 'bond'
+    """
+    tags = []
+    title_upper = contest_title.upper()
+
+    if title_upper.startswith("US"):
+        tags.append("federal")
+    elif title_upper.startswith("NC"):
+        tags.append("state")
+    elif title_upper.startswith("WAKE"):
+        tags.append("local")
+    elif "CITY" in title_upper or "TOWN" in title_upper:
+        tags.append("local")
+    else:
+        # Default if none of the above
+        tags.append("state")
+
+    # If "BOND" is anywhere in the contest title, add "bond"
+    if "BOND" in title_upper:
+        tags.append("ref")
+    elif "REFERENDUM" in title_upper:
+        tags.append("ref")
+
+    return tags
+
+def mutate_contest_title(title: str) -> str:
+    """
+    Mutate contest titles for brevity by:
+      - Dropping specific substrings
+      - Substituting certain words
+      - Removing leading zeros from numbers
+      - Converting to title case
+      - Adjusting capitalization of "of " and "and "
+      - Preserving "US " and "NC " in uppercase
+    """
+    # Define substrings to remove
+    remove_phrases = [
+        "CITY OF ",
+        "TOWN OF ",
+        "IMPROVEMENTS ",
+        "OF REPRESENTATIVES ",
+        " REFERENDUM",
+        " CONSERVATION DISTRICT SUPERVISOR",
+        " CONSERVATION DIST SUPERVISOR"
+    ]
+    # Do not drop "DISTRICT " if it is part of specific phrases
+    if "DISTRICT ATTORNEY" not in title.upper() and "DISTRICT COURT" not in title.upper() and "DISTRICT SUPERVISOR" not in title.upper():
+        remove_phrases.append("DISTRICT ")
+
+    # Define substitutions
+    substitutions = {
+        "Parks, Greenways, Recreation, And Open Space": "Parks and Rec",
+        "Recreation ": "Rec ",
+        "Recreational ": "Rec ",
+        " Bonds": " Bond",
+        "Wake Co. ": "Wake County ",
+        "Wake Co ": "Wake County ",
+        "Soil Water": "Soil and Water"
+    }
+
+    # Remove specific phrases
+    for phrase in remove_phrases:
+        title = title.replace(phrase, "")
+
+    # Convert to title case
+    title = title.title()
+
+    # Apply substitutions
+    for old, new in substitutions.items():
+        title = title.replace(old, new)
+        
+    # Remove leading zeros from numbers using regex
+    title = re.sub(r'\b0+(\d+)', r'\1', title)
+
+    # Adjust "Of " and "And " to lowercase
+    title = title.replace("Of ", "of ").replace("And ", "and ")
+
+    # Restore "US " and "NC " as uppercase after title casing
+    title = title.replace("Us ", "US ").replace("Nc ", "NC ")
+
+    # Remove all commas
+    title = title.replace(",", "")
+
+    return title
+
+def parse_year_from_election_dt(election_dt_values) -> int:
+    """
+    Given an iterable (e.g. a pandas Series) of date strings in 'MM/DD/YYYY' format,
+    return an integer representing the year of the first non-empty date.
+    If none is available or parsing fails, return None.
+    """
+    for dt_str in election_dt_values:
+        if isinstance(dt_str, str) and dt_str.strip():
+            try:
+                dt = datetime.strptime(dt_str, "%m/%d/%Y")
+                return dt.year
+            except ValueError:
+                pass
+    return None
+
+def is_ignored_contest(contest_title: str) -> bool:
+    """Contests outside Wake County that share the results file."""
+    return "DURHAM" in contest_title.upper() or "ANGIER" in contest_title.upper()
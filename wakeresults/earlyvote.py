@@ -0,0 +1,214 @@
+"""
+Cumulative early-voting turnout per day, precinct and demographic group
+from the absentee/one-stop file (the `wakeresults earlyvote` command).
+"""
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from .turnout import WAKE_COUNTY_ID
+from .snapshots import read_snapshot
+
+# Voter file fields behind each demographic prefix, in demoturnout column order
+GROUP_FIELDS = (("gender", "sex_code"), ("race", "race_code"), ("ethnic", "ethnic_code"), ("party", "party_cd"))
+
+VOTER_COLUMNS = ["county_id", "voter_reg_num", "precinct_abbrv", "status_cd"] + [field for _, field in GROUP_FIELDS]
+
+# Absentee file fields; ballots count on the day they were returned (cast, for one-stop)
+ABSENTEE_COLUMNS = {"county": "county_desc", "voter": "voter_reg_num", "date": "ballot_rtn_dt", "status": "ballot_rtn_status"}
+
+WAKE_COUNTY_DESC = "WAKE"
+
+
+class EarlyVoteState:
+    """
+    Everything needed to add another day's file without rescanning.
+
+    The registered voters are kept as a sorted key array with their coded
+    precinct and group per demographic; counts is the (day x precinct x
+    group) array of ballots accepted that day, group 0 being 'total'.
+    counted holds the sorted keys of voters already counted, so cumulative
+    and single-day files can both be added.
+    """
+
+    def __init__(self, arrays):
+        self.voter_keys = arrays["voter_keys"]
+        self.voter_precinct = arrays["voter_precinct"]
+        self.voter_groups = arrays["voter_groups"]
+        self.precincts = arrays["precincts"]
+        self.groups = arrays["groups"]
+        self.registered = arrays["registered"]
+        self.days = arrays["days"]
+        self.counts = arrays["counts"]
+        self.counted = arrays["counted"]
+
+    @classmethod
+    def from_voter_file(cls, voter_file, county_id=WAKE_COUNTY_ID):
+        # Ballots are keyed by the bare voter_reg_num, which is only unique within one county
+        if not county_id:
+            raise ValueError("An early-voting series needs a county_id; voter_reg_num is only unique within a county")
+        voters = read_snapshot(voter_file, county_id, VOTER_COLUMNS)
+        precincts, voter_precinct = np.unique(voters["precinct_abbrv"].to_numpy(dtype=str), return_inverse=True)
+
+        # Group 0 is every voter; then one group per demographic code
+        groups = ["total"]
+        voter_groups = np.empty((len(voters), len(GROUP_FIELDS)), dtype=np.int32)
+        for j, (prefix, field) in enumerate(GROUP_FIELDS):
+            codes, inverse = np.unique(voters[field].to_numpy(dtype=str), return_inverse=True)
+            offset = len(groups) - (1 if codes[0] == "" else 0)
+            voter_groups[:, j] = np.where(codes[inverse] == "", -1, inverse + offset)
+            groups += [f"{prefix}_{code}" for code in codes if code]
+
+        # Registered (active) voters, as in demoturnout's non-_voted columns
+        active = voters["status_cd"].to_numpy() == "A"
+        registered = np.zeros((len(precincts), len(groups)), dtype=np.int32)
+        add_voters(registered, voter_precinct[active], voter_groups[active])
+
+        return cls({
+            "voter_keys": voters["key"].to_numpy(),
+            "voter_precinct": voter_precinct.astype(np.int32),
+            "voter_groups": voter_groups,
+            "precincts": precincts,
+            "groups": np.array(groups, dtype=str),
+            "registered": registered,
+            "days": np.array([], dtype="<U10"),
+            "counts": np.zeros((0, len(precincts), len(groups)), dtype=np.int32),
+            "counted": np.array([], dtype=np.int64),
+        })
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({key: arrays[key] for key in arrays.files})
+
+    def save(self, path):
+        np.savez(path, voter_keys=self.voter_keys, voter_precinct=self.voter_precinct, voter_groups=self.voter_groups,
+                 precincts=self.precincts, groups=self.groups, registered=self.registered, days=self.days,
+                 counts=self.counts, counted=self.counted)
+
+    def add_file(self, absentee_file, county_desc=WAKE_COUNTY_DESC):
+        """
+        Count the accepted ballots in absentee_file that are not counted yet.
+        Returns (ballots added, earliest day touched or None, ballots without a registered voter).
+        """
+        ballots = read_ballots(absentee_file, county_desc)
+        ballots = ballots[~np.isin(ballots["key"].to_numpy(), self.counted)]
+        if ballots.empty:
+            return 0, None, 0
+
+        # Look the voters up in the sorted registration keys
+        keys = ballots["key"].to_numpy()
+        rows = np.minimum(np.searchsorted(self.voter_keys, keys), len(self.voter_keys) - 1)
+        found = self.voter_keys[rows] == keys
+        rows = rows[found]
+
+        # Grow the day axis to cover the new days
+        ballot_days = ballots["day"].to_numpy(dtype=str)[found]
+        days = np.union1d(self.days, ballot_days)
+        if len(days) != len(self.days):
+            counts = np.zeros((len(days),) + self.counts.shape[1:], dtype=np.int32)
+            counts[np.searchsorted(days, self.days)] = self.counts
+            self.days, self.counts = days, counts
+
+        day_rows = np.searchsorted(self.days, ballot_days)
+        for day in np.unique(day_rows):
+            on_day = day_rows == day
+            add_voters(self.counts[day], self.voter_precinct[rows[on_day]], self.voter_groups[rows[on_day]])
+
+        self.counted = np.union1d(self.counted, keys[found])
+        return int(found.sum()), (min(ballot_days) if len(ballot_days) else None), int((~found).sum())
+
+    def cumulative(self):
+        return np.cumsum(self.counts, axis=0)
+
+
+def add_voters(counts, precinct, groups):
+    """Add voters to a (precinct x group) count array: once to 'total' and once per demographic."""
+    n_groups = counts.shape[1]
+    flat = [precinct * n_groups]
+    for group in groups.T:
+        valid = group >= 0
+        flat.append(precinct[valid] * n_groups + group[valid])
+    counts += np.bincount(np.concatenate(flat), minlength=counts.size).reshape(counts.shape).astype(counts.dtype)
+
+
+def read_ballots(absentee_file, county_desc=WAKE_COUNTY_DESC):
+    """Accepted ballots in an absentee file as (key, day), one row per voter at their earliest return."""
+    with open(absentee_file, "r", encoding="utf-8", errors="replace") as f:
+        sep = "\t" if "\t" in f.readline() else ","
+    df = pd.read_csv(absentee_file, sep=sep, usecols=list(ABSENTEE_COLUMNS.values()), dtype=str,
+                     keep_default_na=False, encoding_errors="replace")
+    df = df.rename(columns={v: k for k, v in ABSENTEE_COLUMNS.items()})
+    df = df[(df["county"].str.strip().str.upper() == county_desc) & df["status"].str.strip().str.upper().str.startswith("ACCEPTED")]
+
+    dates = pd.to_datetime(df["date"].str.strip(), format="%m/%d/%Y", errors="coerce")
+    keys = pd.to_numeric(df["voter"].str.strip(), errors="coerce")
+    ballots = pd.DataFrame({"key": keys, "day": dates.dt.strftime("%Y-%m-%d")}).dropna()
+    ballots["key"] = ballots["key"].astype(np.int64)
+    return ballots.sort_values("day").drop_duplicates("key")
+
+
+def demoturnout_columns(groups):
+    """demoturnout column order: total, voted_total, then each prefix's counts followed by its _voted counts."""
+    order = []
+    for prefix, _ in GROUP_FIELDS:
+        members = [i for i, g in enumerate(groups) if g.startswith(f"{prefix}_")]
+        order += [(groups[i], i, False) for i in members] + [(f"{groups[i]}_voted", i, True) for i in members]
+    return order
+
+
+def write_series(state, out_dir, from_day=None):
+    """
+    Write one demoturnout-style CSV of cumulative turnout per day
+    (<out_dir>/<day>.csv, readable by data/view.py and the map) from from_day
+    on, plus series.json with every precinct's cumulative counts per group.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cumulative = state.cumulative()
+    columns = demoturnout_columns(list(state.groups))
+
+    for d, day in enumerate(state.days):
+        if from_day is not None and day < from_day:
+            continue
+        voted = cumulative[d]
+        frame = pd.DataFrame({"id": state.precincts, "total": state.registered[:, 0], "voted_total": voted[:, 0]})
+        for name, i, is_voted in columns:
+            frame[name] = voted[:, i] if is_voted else state.registered[:, i]
+        frame.to_csv(os.path.join(out_dir, f"{day}.csv"), index=False)
+
+    series = {
+        "days": state.days.tolist(),
+        "groups": state.groups.tolist(),
+        "registered": {p: state.registered[i].tolist() for i, p in enumerate(state.precincts)},
+        "cumulative": {p: cumulative[:, i, :].tolist() for i, p in enumerate(state.precincts)},
+    }
+    with open(os.path.join(out_dir, "series.json"), "w", encoding="utf-8") as f:
+        json.dump(series, f, separators=(",", ":"))
+
+
+def run(absentee_files, state_file, out_dir, voter_file=None, county_id=WAKE_COUNTY_ID, county_desc=WAKE_COUNTY_DESC):
+    """Add absentee files to the saved state (creating it from voter_file) and rewrite the changed days."""
+    if voter_file and not county_id:
+        raise SystemExit("earlyvote needs --county: absentee ballots only match voters within one county")
+    if voter_file:
+        state = EarlyVoteState.from_voter_file(voter_file, county_id)
+    elif os.path.exists(state_file):
+        state = EarlyVoteState.load(state_file)
+    else:
+        raise SystemExit(f"{state_file} does not exist; pass --voter-file to create it")
+
+    earliest = None
+    for absentee_file in absentee_files:
+        added, first_day, unmatched = state.add_file(absentee_file, county_desc)
+        print(f"{absentee_file}: {added} ballots added" + (f", {unmatched} without a registered voter" if unmatched else ""))
+        if first_day is not None and (earliest is None or first_day < earliest):
+            earliest = first_day
+
+    state.save(state_file)
+    if earliest is None and not voter_file:
+        print("No new ballots")
+        return
+    write_series(state, out_dir, None if voter_file else earliest)
+    print(f"{len(state.days)} days, {int(state.counts[..., 0].sum())} ballots; series written to {out_dir}")
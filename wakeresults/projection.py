@@ -0,0 +1,302 @@
+"""
+Election-night projections of every contest from partially reported
+precincts (the `wakeresults baseline` and `wakeresults project` commands).
+"""
+import os
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .contests import NON_CANDIDATES, parse_winner_count, parse_year_from_election_dt, mutate_contest_title, is_ignored_contest
+from .results import load_results
+
+# Fixed seed so repeated refreshes of the same file give the same answer
+DEFAULT_SEED = 20241105
+
+DEFAULT_DRAWS = 1000
+
+# Draws simulated per batch; bounds the (draws x open precinct/candidate pairs) arrays
+BATCH_DRAWS = 100
+
+# Share intervals reported for each candidate
+INTERVAL = (5, 95)
+
+# Cap on a reported precinct's log turnout error, so one odd precinct cannot blow up the spread
+MAX_LOG_TURNOUT_ERROR = 2.0
+
+# Baseline features; the intercept must stay first
+FEATURES = ("intercept", "dem_share", "dem_registration", "rep_registration")
+
+
+def partisan_shares(year, json_dir=".", data_dir="data"):
+    """DEM share of the two-party vote per precinct, pooled over every partisan contest of a year."""
+    with open(os.path.join(json_dir, f"{year}.json"), "r", encoding="utf-8") as f:
+        contests = json.load(f)["contests"]
+
+    dem = two_party = pd.Series(dtype=np.float64)
+    for contest in contests:
+        parties = {c.get("column", c["name"]): c.get("political_party", "").strip() for c in contest["candidates"]}
+        dem_cols = [c for c, p in parties.items() if p == "DEM"]
+        rep_cols = [c for c, p in parties.items() if p == "REP"]
+        if not dem_cols or not rep_cols:
+            continue
+        df = pd.read_csv(os.path.join(data_dir, contest["csv_file"]), dtype={"id": str}).set_index("id")
+        d, r = df[dem_cols].sum(axis=1), df[rep_cols].sum(axis=1)
+        dem = dem.add(d, fill_value=0)
+        two_party = two_party.add(d + r, fill_value=0)
+    return (dem / two_party.where(two_party > 0)).dropna()
+
+
+def build_baseline(years, json_dir=".", data_dir="data"):
+    """
+    Precinct baseline matrices from earlier years, computed once offline.
+
+    features holds, per precinct, an intercept, the historical DEM two-party
+    share from the years' contest CSVs and the DEM and REP share of voters
+    from their demoturnout files; turnout is the mean voted_total. Each is
+    averaged over the years the precinct existed in.
+    """
+    shares, dem_reg, rep_reg, turnout = [], [], [], []
+    for year in years:
+        shares.append(partisan_shares(year, json_dir, data_dir))
+        demo = pd.read_csv(os.path.join(data_dir, f"demoturnout{year}.csv"), dtype={"id": str}).set_index("id")
+        voted = demo["voted_total"].where(demo["voted_total"] > 0)
+        dem_reg.append(demo.get("party_DEM_voted", 0) / voted)
+        rep_reg.append(demo.get("party_REP_voted", 0) / voted)
+        turnout.append(demo["voted_total"].astype(np.float64))
+
+    def mean(series):
+        return pd.concat(series, axis=1).mean(axis=1)
+
+    table = pd.DataFrame({
+        "dem_share": mean(shares),
+        "dem_registration": mean(dem_reg),
+        "rep_registration": mean(rep_reg),
+        "turnout": mean(turnout),
+    }).sort_index()
+    table.insert(0, "intercept", 1.0)
+    return {
+        "years": np.array(years, dtype=np.int32),
+        "precincts": table.index.to_numpy(dtype=str),
+        "features": table[list(FEATURES)].to_numpy(dtype=np.float64),
+        "turnout": table["turnout"].to_numpy(dtype=np.float64),
+    }
+
+
+def load_baseline(path):
+    with np.load(path) as arrays:
+        return {key: arrays[key] for key in arrays.files}
+
+
+def current_results(results_file, winners_file=None):
+    """
+    The partial results as aligned arrays: votes (precinct x candidate column),
+    eligible (precinct x contest: the precinct is listed for the contest) and
+    reported (eligible and has at least one vote, over/under included).
+    """
+    df = load_results(results_file)
+    df = df[~df["contest_title"].map(is_ignored_contest)]
+    year = parse_year_from_election_dt(df["election_dt"])
+    winners = parse_winner_count(winners_file) if winners_file else {}
+
+    # One grouped pass over every contest
+    grouped = df.groupby(["contest_title", "candidate_name", "precinct_code"], sort=False)["vote_ct"].sum()
+    titles = list(dict.fromkeys(grouped.index.get_level_values(0)))
+    precincts = np.array(sorted(set(grouped.index.get_level_values(2))), dtype=str)
+    contest_index = {title: i for i, title in enumerate(titles)}
+
+    table = grouped.unstack("precinct_code", fill_value=0).reindex(columns=precincts, fill_value=0)
+    contest_of_row = table.index.get_level_values(0).map(contest_index).to_numpy()
+    candidate_of_row = table.index.get_level_values(1).to_numpy(dtype=str)
+    counts = table.to_numpy(dtype=np.float64).T  # precinct x (contest, candidate)
+
+    eligible = np.zeros((len(precincts), len(titles)), dtype=bool)
+    listed = grouped.reset_index()
+    eligible[pd.Index(precincts).get_indexer(listed["precinct_code"]), listed["contest_title"].map(contest_index)] = True
+
+    ballots = np.zeros((len(precincts), len(titles)))
+    np.add.at(ballots.T, contest_of_row, counts.T)
+    reported = eligible & (ballots > 0)
+
+    keep = ~np.isin(candidate_of_row, NON_CANDIDATES)
+    return {
+        "year": year,
+        "contests": [mutate_contest_title(t) for t in titles],
+        "picks": np.array([winners.get((str(year), t), 1) for t in titles]),
+        "precincts": precincts,
+        "candidates": candidate_of_row[keep],
+        "contest_of_column": contest_of_row[keep],
+        "votes": counts[:, keep],
+        "eligible": eligible,
+        "reported": reported,
+    }
+
+
+def align_baseline(baseline, precincts):
+    """Baseline rows for the given precincts; precincts without history get the baseline means."""
+    rows = pd.Index(baseline["precincts"]).get_indexer(precincts)
+    known = rows >= 0
+    # Features no baseline precinct has (e.g. no partisan contests in the years) become 0
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nan_to_num(np.nanmean(baseline["features"], axis=0))
+    features = np.where(known[:, None], baseline["features"][rows], means)
+    features = np.where(np.isnan(features), means, features)
+    turnout = np.where(known, baseline["turnout"][rows], np.nanmedian(baseline["turnout"]))
+    turnout = np.where(np.isnan(turnout) | (turnout <= 0), np.nanmedian(baseline["turnout"]), turnout)
+    return features, turnout
+
+
+def project(current, baseline, draws=DEFAULT_DRAWS, seed=DEFAULT_SEED):
+    """
+    Monte Carlo projection of every contest at once.
+
+    For each contest, candidate shares in reported precincts are regressed on
+    the baseline features (weighted by ballots, all contests in one stacked
+    solve) and the contest's ballots are scaled against baseline turnout.
+    Each draw samples the regression coefficients (a contest-wide swing), a
+    lognormal turnout factor and a share error per unreported precinct, then
+    adds the simulated votes to the reported ones. Contests with fewer than
+    len(FEATURES) + 2 reported precincts use a flat swing from the reported
+    shares; with fewer than two they are left unprojected (NaN).
+    """
+    rng = np.random.default_rng(seed)
+    X, base_turnout = align_baseline(baseline, current["precincts"])
+    votes = current["votes"]
+    col_contest = current["contest_of_column"]
+    n_precincts, n_contests = current["eligible"].shape
+    n_features = X.shape[1]
+
+    membership = np.zeros((len(col_contest), n_contests))
+    membership[np.arange(len(col_contest)), col_contest] = 1.0
+    reported = current["reported"].astype(np.float64)
+    unreported = current["eligible"] & ~current["reported"]
+
+    # 1. Ballots per (precinct, contest) and their ratio to baseline turnout
+    ballots = votes @ membership
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = (ballots * reported).sum(axis=0) / (base_turnout[:, None] * reported).sum(axis=0)
+        log_error = np.log(ballots / (base_turnout[:, None] * ratio))
+    log_error = np.clip(np.where(reported > 0, log_error, np.nan), -MAX_LOG_TURNOUT_ERROR, MAX_LOG_TURNOUT_ERROR)
+    n_reported = reported.sum(axis=0)
+    turnout_sigma = np.sqrt(np.nansum(log_error ** 2, axis=0) / np.maximum(n_reported - 1, 1))
+    expected_ballots = base_turnout[:, None] * np.nan_to_num(ratio)
+
+    # 2. Weighted least squares for every candidate column in one stacked solve;
+    # contests with only a few reported precincts fall back to the intercept (a flat swing)
+    n_used = np.where(n_reported >= n_features + 2, n_features, 1)
+    used = np.arange(n_features)[None, :] < n_used[:, None]
+    weights = ballots * reported
+    lhs = np.einsum("pf,pc,pg->cfg", X, weights, X) * used[:, :, None] * used[:, None, :]
+    rhs = (X.T @ (votes * reported[:, col_contest])) * used[col_contest].T
+    lhs_inv = np.linalg.pinv(lhs)
+    beta = (lhs_inv[col_contest] @ rhs.T[:, :, None])[:, :, 0]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(ballots[:, col_contest] > 0, votes / ballots[:, col_contest], 0.0)
+    residual = shares - X @ beta.T
+    dof = np.maximum(n_reported - n_used, 1)
+    sigma2 = (weights[:, col_contest] * residual ** 2).sum(axis=0) / dof[col_contest]
+    fitted = n_reported >= 2
+
+    # Coefficient draws use one square root per column of sigma^2 (X'WX)^-1
+    coef_cov = sigma2[:, None, None] * lhs_inv[col_contest]
+    eigenvalues, eigenvectors = np.linalg.eigh((coef_cov + coef_cov.transpose(0, 2, 1)) / 2)
+    coef_chol = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))[:, None, :]
+
+    # 3. Simulate only the open (unreported precinct, candidate column) pairs of fitted contests, in batches of draws
+    pair_precinct, pair_column = np.nonzero(unreported[:, col_contest] & fitted[col_contest])
+    pair_contest = col_contest[pair_column]
+    _, pair_group = np.unique(pair_precinct * n_contests + pair_contest, return_inverse=True)
+    n_pairs, n_columns = len(pair_column), len(col_contest)
+    n_groups = int(pair_group.max()) + 1 if n_pairs else 0
+    # Each pair's fitted share and its loading on the column's coefficient noise; draws run in float32
+    pair_mean = np.einsum("nf,nf->n", X[pair_precinct], beta[pair_column]).astype(np.float32)
+    pair_loading = np.einsum("nf,nfg->gn", X[pair_precinct], coef_chol[pair_column]).astype(np.float32)
+    pair_error = np.sqrt(sigma2[pair_column]).astype(np.float32)
+    pair_expected = expected_ballots[pair_precinct, pair_contest].astype(np.float32)
+    pair_turnout_sigma = np.nan_to_num(turnout_sigma)[pair_contest].astype(np.float32)
+    reported_totals = (votes * reported[:, col_contest]).sum(axis=0)
+    totals = np.empty((draws, n_columns))
+
+    # Flat bincount indices of every pair's group and column, one block per draw in a batch
+    offsets = np.arange(min(BATCH_DRAWS, draws))[:, None]
+    group_index = (offsets * n_groups + pair_group).ravel()
+    column_index = (offsets * n_columns + pair_column).ravel()
+
+    for start in range(0, draws, BATCH_DRAWS):
+        b = min(BATCH_DRAWS, draws - start)
+
+        # Contest-wide swing: one coefficient draw per column
+        swing = rng.standard_normal((n_features, b, n_columns), dtype=np.float32)
+        # Turnout: one lognormal factor per precinct, scaled by each contest's spread
+        precinct_noise = rng.standard_normal((b, n_precincts), dtype=np.float32)
+        turnout = pair_expected * np.exp(precinct_noise[:, pair_precinct] * pair_turnout_sigma)
+        # Shares: the fitted mean plus the swing plus a per-precinct error that shrinks with ballots
+        share = pair_mean + sum(pair_loading[g] * swing[g][:, pair_column] for g in range(n_features))
+        share += rng.standard_normal((b, n_pairs), dtype=np.float32) * pair_error / np.sqrt(np.maximum(turnout, 1.0))
+        np.clip(share, 0.0, None, out=share)
+
+        # Normalize shares within each (precinct, contest), then add the votes to the reported ones
+        group_sum = np.bincount(group_index[:b * n_pairs], share.ravel(), b * n_groups).reshape(b, n_groups)
+        share /= np.where(group_sum > 0, group_sum, 1.0)[:, pair_group]
+        added = np.bincount(column_index[:b * n_pairs], (share * turnout).ravel(), b * n_columns)
+        totals[start:start + b] = reported_totals + added.reshape(b, n_columns)
+
+    totals[:, ~fitted[col_contest] & unreported.any(axis=0)[col_contest]] = np.nan
+    return summarize_draws(current, totals, membership)
+
+
+def summarize_draws(current, totals, membership):
+    """Win probability, median and interval of each candidate's share, per contest."""
+    col_contest = current["contest_of_column"]
+    # Unprojected (NaN) columns are zeroed in the contest sums so they do not spread to other contests
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        share = totals / (np.nan_to_num(totals) @ membership)[:, col_contest] * 100
+        low, median, high = np.nanpercentile(share, [INTERVAL[0], 50, INTERVAL[1]], axis=0)
+
+    projections = []
+    for c, name in enumerate(current["contests"]):
+        cols = np.flatnonzero(col_contest == c)
+        if not len(cols):
+            continue
+        block = totals[:, cols]
+        if np.isnan(block).any():
+            win = np.full(len(cols), np.nan)
+        else:
+            # A candidate wins a draw when ranked within the contest's pick
+            rank = np.argsort(np.argsort(-block, axis=1, kind="stable"), axis=1)
+            win = (rank < current["picks"][c]).mean(axis=0)
+        projections.append({
+            "name": name,
+            "reported": int(current["reported"][:, c].sum()),
+            "precincts": int(current["eligible"][:, c].sum()),
+            "pick": int(current["picks"][c]),
+            "candidates": [
+                {
+                    "name": current["candidates"][k],
+                    "win_probability": None if np.isnan(win[i]) else round(float(win[i]), 4),
+                    "share": None if np.isnan(median[k]) else round(float(median[k]), 2),
+                    "interval": None if np.isnan(low[k]) else [round(float(low[k]), 2), round(float(high[k]), 2)],
+                }
+                for i, k in enumerate(cols)
+            ],
+        })
+    return projections
+
+
+def run_baseline(years, output_file, json_dir=".", data_dir="data"):
+    arrays = build_baseline(years, json_dir, data_dir)
+    np.savez(output_file, **arrays)
+    print(f"Baseline for {len(arrays['precincts'])} precincts from {', '.join(map(str, years))} written to {output_file}")
+
+
+def run_projection(results_file, baseline_file, output_file, winners_file=None, draws=DEFAULT_DRAWS, seed=DEFAULT_SEED):
+    current = current_results(results_file, winners_file)
+    projections = project(current, load_baseline(baseline_file), draws, seed)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump({"year": current["year"], "draws": draws, "seed": seed, "contests": projections}, f, indent=2, ensure_ascii=False)
+    print(f"Projected {len(projections)} contests to {output_file}")
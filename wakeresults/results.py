@@ -0,0 +1,425 @@
+"""
+Per-contest precinct CSVs and the year JSON from SBE results files
+(the `wakeresults results` command).
+"""
+import os
+import io
+import glob
+import re
+import csv
+import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .contests import NON_CANDIDATES, parse_winner_count, get_tags, mutate_contest_title, parse_year_from_election_dt, is_ignored_contest
+
+# Number of color buckets in colorScale.js; metrics breakpoints split precincts into this many quantiles
+COLOR_BUCKETS = 15
+
+# Column types of the SBE precinct-sorted results file
+RESULTS_DTYPES = {
+    "county_id": str,
+    "county": str,
+    "election_dt": str,
+    "result_type_lbl": str,
+    "result_type_desc": str,
+    "contest_id": str,
+    "contest_title": str,
+    "contest_party_lbl": str,
+    "contest_vote_for": str,
+    "precinct_code": str,
+    "precinct_name": str,
+    "candidate_id": str,
+    "candidate_name": str,
+    "candidate_party_lbl": str,
+    "group_num": str,
+    "group_name": str,
+    "voting_method_lbl": str,
+    "voting_method_rslt_desc": str,
+    "vote_ct": float  # read votes as float (cast to int before writing CSV)
+}
+
+def load_results(filepath):
+    """
+    Read an SBE results file and normalize candidate names
+    (write-ins, commas, under/over votes).
+    """
+    # 1. Read the tab-delimited CSV (.txt) into a DataFrame
+    df = pd.read_csv(filepath, sep="\t", dtype=RESULTS_DTYPES)
+
+    # 2. Write-in rule: If result_type_lbl == "WRI", rename candidate_name to "Write-In"
+    df.loc[df["result_type_lbl"] == "WRI", "candidate_name"] = "Write-In"
+
+    # 3. Remove commas from candidate names (keeping the SBE spelling for the identity index)
+    df["raw_candidate_name"] = df["candidate_name"]
+    df["candidate_name"] = df["candidate_name"].str.replace(",", "", regex=False)        
+
+    # 4. Replace UNDER/OVER votes (with or without 'S') with 'under' and 'over'
+    df.loc[df["candidate_name"].str.upper() == "UNDER VOTE", "candidate_name"] = "under"
+    df.loc[df["candidate_name"].str.upper() == "OVER VOTE", "candidate_name"] = "over"
+    df.loc[df["candidate_name"].str.upper() == "UNDER VOTES", "candidate_name"] = "under"
+    df.loc[df["candidate_name"].str.upper() == "OVER VOTES", "candidate_name"] = "over"
+
+    return df
+
+def method_split(by_method, candidate_cols, precincts):
+    """
+    Build the compact voting-method companion of a contest CSV.
+
+    One row per (precinct, voting method) with at least one vote, limited to
+    the candidates and precincts that survived in the totals CSV.
+    """
+    split = (
+        by_method
+        .set_index(["precinct_code", "voting_method_lbl", "candidate_name"])["vote_ct"]
+        .unstack("candidate_name", fill_value=0)
+        .reindex(columns=candidate_cols, fill_value=0)
+    )
+    split = split[split.index.get_level_values("precinct_code").isin(precincts)]
+    split = split.loc[split.sum(axis=1) != 0].astype(int)
+    split.index.set_names(["id", "method"], inplace=True)
+    return split.reset_index()
+
+def contest_metrics(pivot, candidate_cols):
+    """
+    Vectorized per-precinct metrics for a contest pivot.
+
+    Returns (metrics, summary): metrics has one row per precinct with each
+    candidate's share of valid votes (over/under excluded) as '<name>_pct',
+    the precinct winner and runner-up and their 'margin' in points (blank
+    for precincts without valid votes); summary holds the overall
+    winner/runner-up and quantile breakpoints of the margin and of each
+    candidate's share for the map color scale.
+    """
+    valid_cols = [c for c in candidate_cols if c not in NON_CANDIDATES]
+    counts = pivot[valid_cols].to_numpy(dtype=np.float64)
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(totals > 0, counts / totals * 100, 0.0)
+
+    # Top two per precinct in one argsort
+    order = np.argsort(-shares, axis=1, kind="stable")
+    rows = np.arange(len(shares))
+    names = np.array(valid_cols, dtype=object)
+    winner_share = shares[rows, order[:, 0]] if valid_cols else np.zeros(len(shares))
+    runner_share = shares[rows, order[:, 1]] if len(valid_cols) > 1 else np.zeros(len(shares))
+
+    metrics = pd.DataFrame(np.round(shares, 2), columns=[f"{c}_pct" for c in valid_cols])
+    metrics.insert(0, "id", pivot["id"].to_numpy())
+    metrics["winner"] = names[order[:, 0]] if valid_cols else ""
+    metrics["runner_up"] = names[order[:, 1]] if len(valid_cols) > 1 else ""
+    metrics["margin"] = np.round(winner_share - runner_share, 2)
+
+    # A precinct without valid votes has no winner; its all-zero argsort would pick the first column
+    empty = totals[:, 0] == 0
+    metrics.loc[empty, ["winner", "runner_up"]] = ""
+    metrics.loc[empty, "margin"] = np.nan
+
+    # Overall winner and runner-up by total votes
+    overall = counts.sum(axis=0)
+    ranked = [valid_cols[i] for i in np.argsort(-overall, kind="stable")]
+
+    quantiles = np.linspace(0, 1, COLOR_BUCKETS + 1)[1:-1]
+    def breaks(values):
+        return np.round(np.quantile(values, quantiles), 2).tolist() if len(values) else []
+
+    summary = {
+        "winner": ranked[0] if ranked else "",
+        "runner_up": ranked[1] if len(ranked) > 1 else "",
+        "margin_breaks": breaks(metrics["margin"].to_numpy()[~empty]),
+        "share_breaks": {c: breaks(shares[~empty, i]) for i, c in enumerate(valid_cols)},
+    }
+    return metrics, summary
+
+def build_contest(contest_title, sub_df, filename_no_ext, winners_dict, methods=False, metrics=False):
+    """
+    Build the outputs for one contest.
+
+    Returns (contest_info, outputs) where contest_info is the contest's entry
+    in the year JSON and outputs maps CSV file names to the frames to write.
+    """
+    outputs = {}
+
+    # 5b. Get tags before mutating the title
+    tags = get_tags(contest_title)
+
+    # 5c. Mutate the contest title for brevity and title case
+    mutated_title = mutate_contest_title(contest_title)
+
+    # 5d. Determine the year from the election date
+    election_year = parse_year_from_election_dt(sub_df["election_dt"])
+
+    # 5e. Get the number of winners (pick) for this contest
+    pick_value = winners_dict.get((str(election_year), contest_title), 1)            
+
+    # 6. Build the pivot table: Rows = precinct_code, Columns = candidate_name, Values = sum(vote_ct)
+    if methods:
+        # Keep the method dimension in the one pass over the raw rows;
+        # the totals are then a cheap re-sum of the already grouped rows
+        by_method = (
+            sub_df
+            .groupby(["precinct_code", "candidate_name", "voting_method_lbl"], as_index=False)["vote_ct"]
+            .sum()
+        )
+        grouped = by_method.groupby(["precinct_code", "candidate_name"], as_index=False)["vote_ct"].sum()
+    else:
+        grouped = sub_df.groupby(["precinct_code", "candidate_name"], as_index=False)["vote_ct"].sum()
+
+    pivot = (
+        grouped
+        .pivot(index="precinct_code", columns="candidate_name", values="vote_ct")
+        .fillna(0)
+    )
+
+    # --- Drop zero-vote candidates (columns) and zero-vote precincts (rows) ---
+
+    # Reset index so 'precinct_code' becomes a normal "id" column
+    pivot.reset_index(inplace=True)
+    pivot.rename(columns={"precinct_code": "id"}, inplace=True)
+
+    # Identify candidate columns (everything except 'id')
+    candidate_cols = [c for c in pivot.columns if c != "id"]
+
+    # Drop columns (candidates) that sum to 0
+    col_sums = pivot[candidate_cols].sum(axis=0)
+    non_zero_cols = col_sums[col_sums != 0].index.tolist()
+    pivot = pivot[["id"] + non_zero_cols]
+
+    # Drop rows (precincts) that sum to 0 across all remaining columns
+    row_sums = pivot[non_zero_cols].sum(axis=1)
+    pivot = pivot.loc[row_sums != 0].copy()
+
+    # Cast numeric columns to int
+    for col in pivot.columns:
+        if col != "id":
+            pivot[col] = pivot[col].astype(int)
+
+    # The pivot table goes to its own CSV file
+    output_csv_name = f"{filename_no_ext}_{mutated_title.replace(' ', '_')}.csv"
+    outputs[output_csv_name] = pivot
+
+    # 6a. Optionally add the voting-method breakdown alongside it
+    if methods:
+        methods_csv_name = f"{filename_no_ext}_{mutated_title.replace(' ', '_')}_methods.csv"
+        outputs[methods_csv_name] = method_split(by_method, non_zero_cols, pivot["id"])
+
+    # 6b. Optionally add precomputed shares, margins and winners
+    if metrics:
+        metrics_csv_name = f"{filename_no_ext}_{mutated_title.replace(' ', '_')}_metrics.csv"
+        outputs[metrics_csv_name], metrics_summary = contest_metrics(pivot, non_zero_cols)
+
+    # 7. Compute total_votes and candidate summary
+    candidate_sums = (
+        sub_df
+        .groupby("candidate_name", as_index=False)["vote_ct"]
+        .sum()
+    )
+    candidate_sums = candidate_sums[candidate_sums["vote_ct"] != 0].copy()
+
+    # Capture party labels
+    party_map = (
+        sub_df.groupby("candidate_name", as_index=False)["candidate_party_lbl"]
+        .agg(lambda x: x.mode()[0] if not x.mode().empty else "")
+    )
+    candidate_sums = candidate_sums.merge(party_map, on="candidate_name", how="left")
+
+    # Capture the SBE identifiers, which stay stable where display names do not
+    identity_map = (
+        sub_df.groupby("candidate_name")[["candidate_id", "raw_candidate_name"]]
+        .first()
+        .to_dict("index")
+    )
+
+    valid_candidates = candidate_sums[~candidate_sums["candidate_name"].isin(NON_CANDIDATES)]
+    valid_total = valid_candidates["vote_ct"].sum()
+
+    candidates_list = []
+    for _, row_cand in candidate_sums.iterrows():
+        cand_name = row_cand["candidate_name"]
+        party_lbl = row_cand["candidate_party_lbl"] if pd.notnull(row_cand["candidate_party_lbl"]) else ""
+        votes = int(row_cand["vote_ct"])
+        percent = round((votes / valid_total) * 100, 2) if valid_total > 0 else 0
+
+        candidate_info = {
+            "name": cand_name,
+            "political_party": party_lbl,
+            "votes": votes,
+            "total_votes": int(valid_total),
+            "percent": percent,
+            "total": "all"
+        }
+
+        # Write-ins and under/over votes aggregate several SBE candidates
+        if cand_name not in ("Write-In",) + NON_CANDIDATES:
+            identity = identity_map.get(cand_name, {})
+            if pd.notnull(identity.get("candidate_id")):
+                candidate_info["candidate_id"] = identity["candidate_id"]
+            if identity.get("raw_candidate_name") not in (None, cand_name):
+                candidate_info["raw_name"] = identity["raw_candidate_name"]
+        candidates_list.append(candidate_info)
+
+    # 7. Build contest info
+    contest_info = {
+        "name": mutated_title,
+        "contest_id": sub_df["contest_id"].iloc[0],
+        "csv_file": output_csv_name,
+        "year": election_year,
+        "tags": tags,
+        "pick": pick_value,  # Add the pick value                
+        "candidates": candidates_list
+    }
+
+    if metrics:
+        contest_info["metrics"] = {"csv_file": metrics_csv_name, **metrics_summary}
+
+    return contest_info, outputs
+
+def write_year_json(output_json_name, contests_info):
+    """Write the year JSON listing every contest."""
+    with open(output_json_name, "w", encoding="utf-8") as f:
+        json.dump({"contests": contests_info}, f, indent=2, ensure_ascii=False)
+
+# Characters that make pandas quote a CSV field
+CSV_SPECIAL = re.compile(r'[,"\r\n]')
+
+# str(i) for 0..n-1, grown on demand; vote counts are formatted by indexing into it
+_int_strings = np.array([], dtype=object)
+_int_strings_lock = threading.Lock()
+
+def int_strings(counts):
+    """
+    Object array of the decimal strings of a non-negative integer array.
+
+    Writer threads call this concurrently, so each call indexes the table it
+    read or built, and the shared table is only ever replaced by a larger one.
+    """
+    global _int_strings
+    needed = int(counts.max()) + 1 if counts.size else 0
+    table = _int_strings
+    if needed > len(table):
+        size = max(1024, 1 << (needed - 1).bit_length())
+        table = np.array([str(i) for i in range(size)], dtype=object)
+        with _int_strings_lock:
+            if len(table) > len(_int_strings):
+                _int_strings = table
+    return table[counts]
+
+def format_csv(frame):
+    """
+    CSV text of an output frame, byte-identical to frame.to_csv(index=False).
+
+    Contest and method tables (string key columns followed by non-negative
+    integer counts) are formatted by looking every count up in a cached
+    table of decimal strings and joining the cells once; anything else falls
+    back to to_csv.
+    """
+    is_int = [pd.api.types.is_integer_dtype(dtype) for dtype in frame.dtypes]
+    n_keys = len(is_int) - is_int[::-1].index(False) if False in is_int else 0
+    keys = [frame[k].to_numpy(dtype=object) for k in frame.columns[:n_keys]]
+    counts = frame.iloc[:, n_keys:].to_numpy()
+    if (not keys or len(keys) == len(is_int)
+            or (counts.size and counts.min() < 0)
+            or not all(isinstance(v, str) for values in keys for v in values)
+            or any(CSV_SPECIAL.search("".join(values)) for values in keys)):
+        return frame.to_csv(index=False, lineterminator="\n")
+
+    header = io.StringIO()
+    csv.writer(header, lineterminator="\n").writerow(frame.columns)
+
+    # Cells interleaved with their separators, row by row
+    cells = np.empty((len(frame), 2 * len(frame.columns)), dtype=object)
+    for i, values in enumerate(keys):
+        cells[:, 2 * i] = values
+    cells[:, 2 * n_keys::2] = int_strings(counts)
+    cells[:, 1::2] = ","
+    cells[:, -1] = "\n"
+    return header.getvalue() + "".join(cells.ravel().tolist())
+
+class OutputStage:
+    """
+    Stages a run's output files and moves them into out_dir together.
+
+    Tables are formatted and written on a thread pool while the caller keeps
+    aggregating the next contests. Nothing appears in out_dir until commit(),
+    which waits for every write and then renames each staged file into
+    place; a failed run only leaves (and then removes) the hidden staging
+    directory.
+    """
+
+    def __init__(self, out_dir=".", workers=4):
+        self.out_dir = out_dir
+        self.staging = tempfile.mkdtemp(prefix=".staging-", dir=out_dir)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.pending = []
+        self.names = []
+
+    def _write_table(self, name, frame):
+        with open(os.path.join(self.staging, name), "w", encoding="utf-8", newline="") as f:
+            f.write(format_csv(frame))
+
+    def write_table(self, name, frame):
+        self.names.append(name)
+        self.pending.append(self.pool.submit(self._write_table, name, frame))
+
+    def write_json(self, name, contests_info):
+        self.names.append(name)
+        write_year_json(os.path.join(self.staging, name), contests_info)
+
+    def commit(self):
+        for future in self.pending:
+            future.result()  # Re-raises a failed write
+        self.pool.shutdown()
+        for name in self.names:
+            os.replace(os.path.join(self.staging, name), os.path.join(self.out_dir, name))
+        os.rmdir(self.staging)
+
+    def abort(self):
+        self.pool.shutdown(cancel_futures=True)
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+def run(files=None, winners_file="winner.count", out_dir=".", methods=False, metrics=False, writers=4):
+    """Process each results file (default: every .txt in the current directory)."""
+    # Parse the winner.count file to get the number of winners for contests
+    winners_dict = parse_winner_count(winners_file)
+
+    for filepath in files or glob.glob("*.txt"):
+        filename_no_ext = os.path.splitext(os.path.basename(filepath))[0]
+        output_json_name = f"{filename_no_ext}.json"
+
+        contests_info = []  # Will hold metadata for all contests in this file
+
+        # 1-4. Read and normalize the results file
+        df = load_results(filepath)
+
+        with OutputStage(out_dir, writers) as stage:
+            # 5. Split the rows by contest once, in order of first appearance
+            for contest_title, sub_df in df.groupby("contest_title", sort=False):
+                # Skip ignored contests
+                if is_ignored_contest(contest_title):
+                    continue
+
+                contest_info, outputs = build_contest(contest_title, sub_df, filename_no_ext, winners_dict,
+                                                     methods, metrics)
+
+                # Queue the pivot table (and method split) for writing while the next contest aggregates
+                for output_csv_name, frame in outputs.items():
+                    stage.write_table(output_csv_name, frame)
+
+                contests_info.append(contest_info)
+
+            # 8. Write the JSON file for this input file
+            stage.write_json(output_json_name, contests_info)
@@ -0,0 +1,118 @@
+"""
+Per-precinct changes between two voter registration snapshots
+(the `wakeresults snapshot-diff` command).
+"""
+import numpy as np
+import pandas as pd
+
+from .turnout import WAKE_COUNTY_ID, detect_encoding
+
+SNAPSHOT_COLUMNS = ["county_id", "voter_reg_num", "precinct_abbrv", "status_cd", "party_cd"]
+
+# Count columns written before the per-party net changes
+DELTA_COLUMNS = ["total_before", "total_after", "new", "removed", "moved_in", "moved_out", "party_switched", "status_changed"]
+
+
+def read_snapshot(path, county_id=WAKE_COUNTY_ID, columns=SNAPSHOT_COLUMNS):
+    """
+    Read the given fields of a voter file as a DataFrame sorted by voter.
+
+    The key is voter_reg_num, which is only unique within a county, so it is
+    prefixed with county_id (county * 10**12 + reg num) when no county filter
+    is applied; precinct_abbrv is qualified the same way ("<county>:<precinct>")
+    so same-named precincts of different counties stay apart. Older files'
+    gender_code column is read as sex_code.
+    """
+    wanted = set(columns) | {"gender_code"} if "sex_code" in columns else set(columns)
+    df = pd.read_csv(path, sep="\t", usecols=lambda c: c in wanted, dtype=str, keep_default_na=False,
+                     encoding=detect_encoding(path), encoding_errors="replace")
+    df = df.rename(columns={"gender_code": "sex_code"})
+    for column in columns:
+        df[column] = df[column].str.strip()
+    if county_id:
+        df = df[df["county_id"] == county_id]
+
+    key = pd.to_numeric(df["voter_reg_num"], errors="coerce").to_numpy()
+    if not county_id:
+        key = key + pd.to_numeric(df["county_id"], errors="coerce").to_numpy() * 10**12
+        if "precinct_abbrv" in df.columns:
+            df["precinct_abbrv"] = df["county_id"] + ":" + df["precinct_abbrv"]
+    df = df.assign(key=key).dropna(subset=["key"])
+    df["key"] = df["key"].astype(np.int64)
+    return df.sort_values("key", kind="stable").drop_duplicates("key", keep="last")
+
+
+def encode(before, after, column):
+    """Integer codes for a column of both snapshots against one shared, sorted vocabulary."""
+    categories = np.union1d(before[column].unique(), after[column].unique())
+    return (pd.Categorical(before[column], categories).codes.astype(np.int32),
+            pd.Categorical(after[column], categories).codes.astype(np.int32),
+            categories)
+
+
+def diff_snapshots(before, after):
+    """
+    Per-precinct transition counts between two sorted snapshots.
+
+    Both snapshots become sorted key arrays with coded precinct, status and
+    party, and one merge-join (np.intersect1d on the sorted keys) splits
+    voters into new, removed and matched. Matched voters whose precinct
+    differs count as moved_out of the old precinct and moved_in to the new
+    one; party_switched and status_changed are counted at the new precinct;
+    new voters at their new precinct and removed voters at their old one.
+    party_<code> columns hold each party's net change in registrants.
+    Returns a DataFrame indexed by precinct.
+    """
+    precinct_before, precinct_after, precincts = encode(before, after, "precinct_abbrv")
+    status_before, status_after, _ = encode(before, after, "status_cd")
+    party_before, party_after, parties = encode(before, after, "party_cd")
+    keys_before, keys_after = before["key"].to_numpy(), after["key"].to_numpy()
+
+    # One merge-join over the sorted keys
+    _, i_before, i_after = np.intersect1d(keys_before, keys_after, assume_unique=True, return_indices=True)
+    removed = np.ones(len(keys_before), dtype=bool)
+    removed[i_before] = False
+    new = np.ones(len(keys_after), dtype=bool)
+    new[i_after] = False
+
+    moved = precinct_before[i_before] != precinct_after[i_after]
+    switched = party_before[i_before] != party_after[i_after]
+    status_changed = status_before[i_before] != status_after[i_after]
+
+    n = len(precincts)
+    def count(codes, mask=None):
+        return np.bincount(codes if mask is None else codes[mask], minlength=n)
+
+    counts = {
+        "total_before": count(precinct_before),
+        "total_after": count(precinct_after),
+        "new": count(precinct_after, new),
+        "removed": count(precinct_before, removed),
+        "moved_in": count(precinct_after[i_after], moved),
+        "moved_out": count(precinct_before[i_before], moved),
+        "party_switched": count(precinct_after[i_after], switched),
+        "status_changed": count(precinct_after[i_after], status_changed),
+    }
+
+    # Net change per (precinct, party) from two 2-D bincounts
+    m = len(parties)
+    party_net = (np.bincount(precinct_after * m + party_after, minlength=n * m)
+                 - np.bincount(precinct_before * m + party_before, minlength=n * m)).reshape(n, m)
+    for j, party in enumerate(parties):
+        if party:
+            counts[f"party_{party}"] = party_net[:, j]
+
+    result = pd.DataFrame(counts, index=pd.Index(precincts, name="id"))
+    return result[result.any(axis=1)]
+
+
+def write_diff(before_file, after_file, output_file, county_id=WAKE_COUNTY_ID):
+    """Diff two voter snapshots and write the demoturnout-style delta CSV."""
+    before = read_snapshot(before_file, county_id)
+    after = read_snapshot(after_file, county_id)
+    result = diff_snapshots(before, after)
+    result.reset_index().to_csv(output_file, index=False)
+
+    totals = result[DELTA_COLUMNS[2:]].sum()
+    print(f"{len(before)} -> {len(after)} voters: " + ", ".join(f"{totals[c]} {c}" for c in totals.index))
+    print(f"Delta summary written to {output_file}.")
@@ -0,0 +1,51 @@
+"""
+Refresh a turnout summary JSON (<year>d.json, maps.json) from its
+demoturnout CSV (the `wakeresults summarize` command).
+"""
+import os
+import csv
+import json
+
+
+def column_sums(csv_file):
+    """Sum every numeric column of a CSV."""
+    sums = {}
+    with open(csv_file, "r", newline="") as csv_f:
+        reader = csv.reader(csv_f)
+        header = next(reader)
+        for row in reader:
+            for column, value in zip(header, row):
+                try:
+                    sums[column] = sums.get(column, 0) + int(value)
+                except ValueError:
+                    pass  # Ignore non-numeric values
+    return sums
+
+
+def update_json(csv_file, json_file, output_file):
+    """Recompute each candidate's votes, total_votes and percent from the CSV column sums."""
+    sums = column_sums(csv_file)
+
+    # Load JSON file
+    with open(json_file, "r") as json_f:
+        data = json.load(json_f)
+
+    # Update JSON data
+    csv_filename = os.path.basename(csv_file)
+    year = int("".join(filter(str.isdigit, csv_filename))[-4:])  # Extract year from filename
+
+    for contest in data.get("contests", []):
+        contest["csv_file"] = csv_filename
+        contest["year"] = year
+
+        for candidate in contest.get("candidates", []):
+            votes = sums.get(candidate.get("column"), 0)
+            total_votes = sums.get(candidate.get("total"), 0)
+
+            candidate["votes"] = votes
+            candidate["total_votes"] = total_votes
+            candidate["percent"] = round((votes / total_votes) * 100, 2) if total_votes > 0 else 0.0
+
+    # Write updated JSON to output file
+    with open(output_file, "w") as out_f:
+        json.dump(data, out_f, indent=4)
@@ -0,0 +1,119 @@
+"""
+Precinct demographic turnout summary from the NC voter registration and
+voter history files (the `wakeresults turnout` command).
+
+Only the standard library is used, so the command starts instantly.
+"""
+import csv
+from collections import defaultdict
+
+# Wake County's county_id in the statewide files
+WAKE_COUNTY_ID = "92"
+
+# Demographic prefixes in output column order; older voter files call sex_code gender_code
+DEMOGRAPHICS = (
+    ("gender", ("sex_code", "gender_code")),
+    ("race", ("race_code",)),
+    ("ethnic", ("ethnic_code",)),
+    ("party", ("party_cd",)),
+)
+
+
+def detect_encoding(path):
+    """The statewide voter file is UTF-16 (with a BOM); county extracts are UTF-8."""
+    with open(path, "rb") as f:
+        head = f.read(2)
+    return "utf-16" if head in (b"\xff\xfe", b"\xfe\xff") else "utf-8-sig"
+
+
+def column_index(header, names, path):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    raise ValueError(f"{path} has none of the columns {', '.join(names)}")
+
+
+def load_voters_who_voted(voting_file, election_label, county_id=WAKE_COUNTY_ID):
+    """Load voter_reg_num for voters who voted in the specified election."""
+    voted_voters = set()
+    with open(voting_file, "r", encoding=detect_encoding(voting_file), errors="replace", newline="") as file:
+        reader = csv.reader(file, delimiter="\t")
+        header = [name.strip() for name in next(reader)]
+        election = header.index("election_lbl")
+        voter = header.index("voter_reg_num")
+        county = header.index("county_id") if county_id and "county_id" in header else None
+
+        for row in reader:
+            if row[election].strip() == election_label and (county is None or row[county].strip() == county_id):
+                voted_voters.add(row[voter].strip())
+
+    print(f"{len(voted_voters)} voters in {voting_file} voted in '{election_label}'.")
+    return voted_voters
+
+
+def aggregate_voters(voter_file, voted_voters, county_id=WAKE_COUNTY_ID):
+    """
+    Count active voters and those who voted per precinct and demographic.
+
+    Returns (precinct_data, codes): precinct_data maps a precinct to its
+    counters in file order; codes maps each demographic prefix to the codes seen.
+    """
+    precinct_data = defaultdict(lambda: defaultdict(int))
+    codes = {prefix: set() for prefix, _ in DEMOGRAPHICS}
+
+    with open(voter_file, "r", encoding=detect_encoding(voter_file), errors="replace", newline="") as file:
+        reader = csv.reader(file, delimiter="\t")
+        header = [name.strip() for name in next(reader)]
+        status = header.index("status_cd")
+        precinct_col = header.index("precinct_abbrv")
+        voter = header.index("voter_reg_num")
+        county = header.index("county_id") if county_id and "county_id" in header else None
+        demographic_cols = [(prefix, column_index(header, names, voter_file), codes[prefix])
+                            for prefix, names in DEMOGRAPHICS]
+
+        row_count = matched_rows = 0
+        for row in reader:
+            row_count += 1
+            if row[status].strip() != "A" or (county is not None and row[county].strip() != county_id):
+                continue
+            matched_rows += 1
+
+            data = precinct_data[row[precinct_col].strip()]
+            voted = row[voter].strip() in voted_voters
+            data["total"] += 1
+            if voted:
+                data["voted_total"] += 1
+
+            for prefix, col, code_set in demographic_cols:
+                code = row[col].strip()
+                if code:
+                    key = f"{prefix}_{code}"
+                    data[key] += 1
+                    code_set.add(code)
+                    if voted:
+                        data[f"{key}_voted"] += 1
+
+    print(f"Processed {row_count} rows in {voter_file}, of which {matched_rows} matched criteria.")
+    return precinct_data, codes
+
+
+def write_summary(output_file, precinct_data, codes):
+    """Write the demoturnout CSV: totals, then each demographic's counts and voted counts."""
+    columns = []
+    for prefix, _ in DEMOGRAPHICS:
+        columns += [f"{prefix}_{code}" for code in sorted(codes[prefix])]
+        columns += [f"{prefix}_{code}_voted" for code in sorted(codes[prefix])]
+
+    with open(output_file, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["precinct_abbrv", "total", "voted_total"] + columns)
+        for precinct, data in precinct_data.items():
+            writer.writerow([precinct, data["total"], data.get("voted_total", 0)] + [data.get(c, 0) for c in columns])
+
+
+def process_voter_file(voter_file, voting_file, output_file, election_label, county_id=WAKE_COUNTY_ID):
+    """Process the voter file and generate a precinct-level summary."""
+    voted_voters = load_voters_who_voted(voting_file, election_label, county_id)
+    precinct_data, codes = aggregate_voters(voter_file, voted_voters, county_id)
+    write_summary(output_file, precinct_data, codes)
+    print(f"Summary written to {output_file}.")
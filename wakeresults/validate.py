@@ -0,0 +1,119 @@
+"""
+Cross-check the published CSVs against the year and turnout JSON files
+(the `wakeresults validate` command).
+"""
+import os
+import re
+import glob
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .contests import NON_CANDIDATES
+
+
+def read_counts(csv_path):
+    """Read a contest or turnout CSV as (precinct ids, column names, int64 matrix)."""
+    df = pd.read_csv(csv_path, dtype={"id": str})
+    return df["id"].to_numpy(), list(df.columns[1:]), df.iloc[:, 1:].to_numpy(dtype=np.int64)
+
+
+def check_results_contest(contest, data_dir):
+    """Cross-check one <year>.json contest against its CSV. Returns a list of problems."""
+    where = f"{contest['year']} {contest['name']} ({contest['csv_file']})"
+    csv_path = os.path.join(data_dir, contest["csv_file"])
+    if not os.path.isfile(csv_path):
+        return [f"{where}: CSV file missing"]
+
+    problems = []
+    precincts, columns, counts = read_counts(csv_path)
+    sums = dict(zip(columns, counts.sum(axis=0).tolist()))
+
+    # test.py drops all-zero candidates and precincts
+    zero_cols = [c for c, s in sums.items() if s == 0]
+    if zero_cols:
+        problems.append(f"{where}: zero-vote columns {zero_cols}")
+    zero_rows = precincts[counts.sum(axis=1) == 0]
+    if len(zero_rows):
+        problems.append(f"{where}: zero-vote precincts {list(zero_rows)}")
+    if len(set(precincts)) != len(precincts):
+        problems.append(f"{where}: duplicate precinct rows")
+
+    valid_total = sum(s for c, s in sums.items() if c not in NON_CANDIDATES)
+    listed = set()
+    for candidate in contest["candidates"]:
+        column = candidate.get("column", candidate["name"])
+        listed.add(column)
+        if column not in sums:
+            problems.append(f"{where}: {column!r} has no CSV column")
+            continue
+        if candidate["votes"] != sums[column]:
+            problems.append(f"{where}: {column!r} votes {candidate['votes']} != CSV sum {sums[column]}")
+        if candidate.get("total", "all") == "all" and candidate["total_votes"] != valid_total:
+            problems.append(f"{where}: {column!r} total_votes {candidate['total_votes']} != CSV total {valid_total}")
+
+    unlisted = [c for c in columns if c not in listed]
+    if unlisted:
+        problems.append(f"{where}: CSV columns missing from JSON {unlisted}")
+    return problems
+
+
+def check_turnout_contest(contest, data_dir):
+    """Cross-check one *d.json turnout entry against its demoturnout CSV."""
+    where = f"{contest['year']} {contest['name']} ({contest['csv_file']})"
+    csv_path = os.path.join(data_dir, contest["csv_file"])
+    if not os.path.isfile(csv_path):
+        return [f"{where}: CSV file missing"]
+
+    problems = []
+    _, columns, counts = read_counts(csv_path)
+    sums = dict(zip(columns, counts.sum(axis=0).tolist()))
+    for candidate in contest["candidates"]:
+        for field, column in (("votes", candidate.get("column")), ("total_votes", candidate.get("total"))):
+            # a.py counts a column absent from that year's CSV (e.g. no Green voters) as 0
+            if column not in sums and candidate.get(field) != 0:
+                problems.append(f"{where}: {candidate['name']!r} column {column!r} not in CSV")
+            elif column in sums and candidate.get(field) != sums[column]:
+                problems.append(f"{where}: {candidate['name']!r} {field} {candidate.get(field)} != CSV sum {sums[column]}")
+    return problems
+
+
+def check_file(json_file, data_dir):
+    """Check every contest of one JSON file; runs in a worker process."""
+    with open(json_file, "r", encoding="utf-8") as f:
+        contests = json.load(f)["contests"]
+
+    turnout = not re.fullmatch(r"\d{4}\.json", os.path.basename(json_file))
+    check = check_turnout_contest if turnout else check_results_contest
+
+    problems = []
+    for contest in contests:
+        problems.extend(check(contest, data_dir))
+    return json_file, len(contests), problems
+
+
+def validate(json_dir=".", data_dir="data", workers=None):
+    """Validate every year and turnout JSON in parallel. Returns {json file: problems}."""
+    json_files = [
+        path for path in sorted(glob.glob(os.path.join(json_dir, "*.json")))
+        if re.fullmatch(r"\d{4}d?\.json", os.path.basename(path)) or os.path.basename(path) == "maps.json"
+    ]
+    report = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for json_file, n_contests, problems in pool.map(check_file, json_files, [data_dir] * len(json_files)):
+            report[json_file] = (n_contests, problems)
+    return report
+
+
+def report(results):
+    """Print the per-file status; returns the number of problems."""
+    failures = 0
+    for json_file, (n_contests, problems) in results.items():
+        status = "ok" if not problems else f"{len(problems)} problems"
+        print(f"{os.path.basename(json_file)}: {n_contests} contests, {status}")
+        for problem in problems:
+            print(f"  {problem}")
+        failures += len(problems)
+    return failures